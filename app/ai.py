@@ -1,30 +1,360 @@
-from openai import OpenAI
-from app.config import OPENAI_API_KEY
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from app.config import (
+    OPENAI_API_KEY, OPENAI_TIMEOUT, OPENAI_CONNECT_TIMEOUT, OPENAI_MAX_RETRIES, OPENAI_MAX_CONNECTIONS,
+    SEO_CACHE_TTL, SEO_CACHE_SIZE, SEO_CACHE_PERSIST, SEO_BATCH_CONCURRENCY, SEO_LATENCY_BUDGET,
+)
+from app.metrics import counter
+from app.models import SeoCacheEntry
+from app.seo_local import local_seo
+from app.singleflight import SingleFlight
+from app.utils import session_scope
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from hashlib import sha256
+import asyncio
+import httpx
 import json
+import logging
 import re
+import unicodedata
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
 
-def gen_seo(topic: str, lang: str = "en") -> dict:
-    prompt = f"""YouTube SEO: topic: {topic}.
-Language: {lang}. Return: only in JSON format: title, description (max 1500 characters), tags (10-15)."""
+# Prompt o'zgarsa oshiriladi - eski keshdagi javoblar ishlatilmaydi
+PROMPT_VERSION = 1
 
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
-    )
-    text = resp.choices[0].message.content.strip()
+# Bitta umumiy ulanishlar havzasi: so'rovlar event loopni to'xtatmaydi, bir vaqtdagi
+# ulanishlar soni cheklangan, vaqt chegarasi va qayta urinishlar (429/5xx) sozlangan
+client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+    max_retries=OPENAI_MAX_RETRIES,
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS),
+    ),
+)
+
+seo_cache_requests = counter("seo_cache_requests_total", "SEO cache lookups by result")
+seo_local_results = counter("seo_local_results_total", "Local SEO answers given instead of the LLM one, by reason")
+
+
+def normalize_topic(topic: str) -> str:
+    """Case, spacing, apostrophe variants and trailing punctuation do not change the key."""
+    text = unicodedata.normalize("NFKC", topic).lower()
+    text = re.sub(r"[ʼ‘’`´]", "'", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(".!?,;: ")
+
+
+def seo_cache_key(topic: str, lang: str) -> str:
+    return sha256(f"{PROMPT_VERSION}\n{lang}\n{normalize_topic(topic)}".encode()).hexdigest()
+
+
+def load_seo(key: str) -> tuple[dict, datetime] | None:
+    with session_scope() as db:
+        entry = db.get(SeoCacheEntry, key)
+        if not entry:
+            return None
+        return json.loads(entry.payload), entry.created_at
+
+
+def save_seo(key: str, topic: str, lang: str, data: dict, created_at: datetime):
+    with session_scope() as db:
+        db.merge(SeoCacheEntry(
+            key=key,
+            topic=topic,
+            lang=lang,
+            prompt_version=PROMPT_VERSION,
+            payload=json.dumps(data, ensure_ascii=False),
+            created_at=created_at
+        ))
+
+
+class SeoCache:
+    """gen_seo results: in-memory LRU in front of the seo_cache table, with a TTL."""
+
+    def __init__(self, ttl: int, max_size: int, persist: bool):
+        self.ttl = timedelta(seconds=ttl)
+        self.max_size = max_size
+        self.persist = persist
+        self._items: OrderedDict[str, tuple[dict, datetime]] = OrderedDict()
+
+    def _put(self, key: str, data: dict, created_at: datetime):
+        self._items[key] = (data, created_at)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def _fresh(self, created_at: datetime) -> bool:
+        return datetime.now() - created_at < self.ttl
+
+    async def get(self, key: str) -> dict | None:
+        entry = self._items.get(key)
+        if entry and self._fresh(entry[1]):
+            self._items.move_to_end(key)
+            seo_cache_requests.inc(result="hit_memory")
+            return entry[0]
+        if self.persist:
+            try:
+                entry = await asyncio.to_thread(load_seo, key)
+            except Exception as e:
+                logger.error(f"SEO keshini o'qishda xato: {e}")
+                entry = None
+            if entry and self._fresh(entry[1]):
+                self._put(key, *entry)
+                seo_cache_requests.inc(result="hit_db")
+                return entry[0]
+        seo_cache_requests.inc(result="miss")
+        return None
+
+    async def put(self, key: str, topic: str, lang: str, data: dict):
+        created_at = datetime.now()
+        self._put(key, data, created_at)
+        if self.persist:
+            try:
+                await asyncio.to_thread(save_seo, key, topic, lang, data, created_at)
+            except Exception as e:
+                logger.error(f"SEO keshiga yozishda xato: {e}")
+
+
+seo_cache = SeoCache(SEO_CACHE_TTL, SEO_CACHE_SIZE, SEO_CACHE_PERSIST)
+
+# Bir xil mavzu bir vaqtda so'ralsa OpenAI'ga bitta so'rov ketadi, qismlar hammaga tarqatiladi
+seo_flights = SingleFlight("seo")
+
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+def _partial_string(text: str, i: int) -> tuple[str, int, bool]:
+    """Decodes the JSON string starting at text[i] (a quote), even if it is cut off.
+
+    Returns the decoded text, the index after it and whether the closing
+    quote was seen.
+    """
+    out = []
+    i += 1
+    done = False
+    while i < len(text):
+        c = text[i]
+        if c == '"':
+            i += 1
+            done = True
+            break
+        if c == "\\":
+            if i + 1 >= len(text):
+                break
+            e = text[i + 1]
+            if e == "u":
+                if i + 6 > len(text):
+                    break
+                out.append(chr(int(text[i + 2:i + 6], 16)))
+                i += 6
+                continue
+            out.append(_ESCAPES.get(e, e))
+            i += 2
+            continue
+        out.append(c)
+        i += 1
+    # \uXXXX juftliklari (emoji) birlashtiriladi, yarim qolgani tashlanadi
+    value = "".join(out).encode("utf-16", "surrogatepass").decode("utf-16", "ignore")
+    return value, i, done
+
+
+def _skip(text: str, i: int, chars: str = " \t\r\n") -> int:
+    while i < len(text) and text[i] in chars:
+        i += 1
+    return i
 
+
+def parse_partial_json(text: str) -> dict:
+    """Fields of a JSON object that is still being streamed.
+
+    Finished string values are returned whole, the string being written is
+    returned as far as it has arrived, and arrays contain only the items
+    that are complete. Anything before the first "{" (e.g. a ```json
+    fence) is ignored.
+    """
+    result = {}
+    i = text.find("{")
+    if i < 0:
+        return result
+    i += 1
+    while True:
+        i = _skip(text, i, " \t\r\n,")
+        if i >= len(text) or text[i] != '"':
+            return result
+        key, i, done = _partial_string(text, i)
+        i = _skip(text, i)
+        if not done or i >= len(text) or text[i] != ":":
+            return result
+        i = _skip(text, i + 1)
+        if i >= len(text):
+            return result
+        if text[i] == '"':
+            result[key], i, done = _partial_string(text, i)
+            if not done:
+                return result
+        elif text[i] == "[":
+            items = []
+            result[key] = items
+            i += 1
+            while True:
+                i = _skip(text, i, " \t\r\n,")
+                if i >= len(text):
+                    return result
+                if text[i] == "]":
+                    i += 1
+                    break
+                if text[i] != '"':
+                    return result
+                item, i, done = _partial_string(text, i)
+                if not done:
+                    return result
+                items.append(item)
+        else:
+            # Son, true/false/null - SEO javobida kutilmaydi, o'tkazib yuboramiz
+            match = re.compile(r"[^,}]*").match(text, i)
+            i = match.end()
+
+
+def _final_seo(text: str) -> dict | None:
     match = re.search(r"\{.*\}", text, re.S)
     if match:
         try:
             return json.loads(match.group())
         except json.JSONDecodeError:
             pass
+    return None
+
+
+async def stream_seo(topic: str, lang: str = "en", refresh: bool = False):
+    """Yields the SEO answer as it is generated: title first, then description, then tags.
+
+    Every yield is a dict of the fields received so far and the last one is
+    the complete answer. A cached answer is yielded once, as is. Concurrent
+    requests for the same topic share one completion.
+    """
+    key = seo_cache_key(topic, lang)
+    async for data in seo_flights.stream((key, refresh), lambda: _stream_seo(key, topic, lang, refresh)):
+        yield data
+
+
+async def _stream_seo(key: str, topic: str, lang: str, refresh: bool):
+    if refresh:
+        seo_cache_requests.inc(result="bypass")
+    else:
+        cached = await seo_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    prompt = f"""YouTube SEO: topic: {topic}.
+Language: {lang}. Return: only in JSON format: title, description (max 1500 characters), tags (10-15)."""
+
+    stream = await client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.7,
+        stream=True
+    )
+    text = ""
+    last = {}
+    async for chunk in stream:
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        text += chunk.choices[0].delta.content
+        partial = parse_partial_json(text)
+        if partial != last:
+            last = partial
+            yield partial
+
+    text = text.strip()
+    data = _final_seo(text)
+    if data is not None:
+        await seo_cache.put(key, topic, lang, data)
+        yield data
+        return
+
+    # JSON bo'lmagan javob keshlanmaydi - keyingi safar qayta so'raladi
+    logger.warning(f"SEO javobi JSON emas, lokal variant ishlatiladi ({topic})")
+    seo_local_results.inc(reason="invalid")
+    yield local_seo(topic, lang)
+
+
+async def gen_seo(topic: str, lang: str = "en", refresh: bool = False) -> dict:
+    """SEO title, description and tags for the topic.
+
+    Results are cached by normalized topic, language and PROMPT_VERSION;
+    refresh=True skips the cache and replaces the stored answer.
+    """
+    data = {}
+    async for data in stream_seo(topic, lang, refresh):
+        pass
+    return data
+
+
+def _log_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.error(f"SEO yaratishda xato: {task.exception()}")
+
+
+async def gen_seo_hedged(
+    topic: str,
+    lang: str = "en",
+    budget: float = SEO_LATENCY_BUDGET,
+    task: asyncio.Task | None = None
+) -> tuple[dict, bool, asyncio.Task | None]:
+    """gen_seo within a latency budget: (answer, whether it is the LLM one, pending task).
+
+    Returns the LLM answer if it is ready within `budget` seconds. Otherwise
+    returns local_seo() straight away together with the still running LLM
+    task, so the caller can show the better answer when it arrives; the
+    task fills the cache either way. An LLM error also falls back to the
+    local answer. `task` is an already started gen_seo task to wait for.
+    """
+    if task is None:
+        task = asyncio.create_task(gen_seo(topic, lang))
+    await asyncio.wait({task}, timeout=budget or None)
+    if not task.done():
+        seo_local_results.inc(reason="slow")
+        task.add_done_callback(_log_failure)
+        return local_seo(topic, lang), False, task
+    if task.exception():
+        logger.error(f"SEO yaratishda xato ({topic}): {task.exception()}")
+        seo_local_results.inc(reason="error")
+        return local_seo(topic, lang), False, None
+    return task.result(), True, None
+
+
+async def gen_seo_batch(topics: list[str], lang: str = "en", concurrency: int = SEO_BATCH_CONCURRENCY):
+    """Yields (topic, data, from_ai, pending) for every topic in the order they finish.
+
+    At most `concurrency` topics are generated at once. Topics the LLM
+    does not answer within the latency budget get the local answer, with
+    `pending` being the LLM task to upgrade it from (see gen_seo_hedged).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(topic: str):
+        await semaphore.acquire()
+        try:
+            data, from_ai, pending = await gen_seo_hedged(topic, lang)
+        except BaseException:
+            semaphore.release()
+            raise
+        # Kechikkan so'rov ham o'rinni tugaguncha band qilib turadi
+        if pending is None:
+            semaphore.release()
+        else:
+            pending.add_done_callback(lambda _: semaphore.release())
+        return topic, data, from_ai, pending
 
-    return {
-        "title": topic[:100],
-        "description": text,
-        "tags": ["youtube", "video"]
-    }
+    tasks = [asyncio.create_task(one(topic)) for topic in topics]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        # Foydalanuvchi kutmay qolsa qolgan mavzular to'xtatiladi
+        for task in tasks:
+            task.cancel()
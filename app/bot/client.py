@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer, BareFilesPathWrapper, SimpleFilesPathWrapper
+
+from app.config import (
+    BOT_TOKEN, TELEGRAM_API_URL, TELEGRAM_API_LOCAL, TELEGRAM_API_FILES_DIR, TELEGRAM_API_LOCAL_FILES_DIR,
+)
+
+
+def create_bot() -> Bot:
+    """Bot for the cloud Bot API or, with TELEGRAM_API_URL, a self-hosted server.
+
+    In local mode getFile has no 20 MB limit and returns a path on the
+    server's disk; if the bot sees that directory under another path (e.g.
+    a shared docker volume), TELEGRAM_API_FILES_DIR is mapped to
+    TELEGRAM_API_LOCAL_FILES_DIR.
+    """
+    if not TELEGRAM_API_URL:
+        return Bot(token=BOT_TOKEN)
+    if TELEGRAM_API_FILES_DIR and TELEGRAM_API_LOCAL_FILES_DIR:
+        wrapper = SimpleFilesPathWrapper(Path(TELEGRAM_API_FILES_DIR), Path(TELEGRAM_API_LOCAL_FILES_DIR))
+    else:
+        wrapper = BareFilesPathWrapper()
+    api = TelegramAPIServer.from_base(TELEGRAM_API_URL, is_local=TELEGRAM_API_LOCAL, wrap_local_file=wrapper)
+    return Bot(token=BOT_TOKEN, session=AiohttpSession(api=api))
@@ -1,20 +1,30 @@
 import asyncio
-from aiogram import Bot, Dispatcher
-from app.config import BOT_TOKEN
+from aiogram import Dispatcher
+from app.config import PREWARM_ENABLED, METRICS_PORT
 from app.db import init_db
+from app.bot.client import create_bot
+from app.charts import start_chart_pool
 from app.bot.router_base import router as base_router
 from app.bot.router_seo import router as seo_router
 from app.bot.router_upload import router as upload_router
 from app.bot.router_statistics import router as statistics_router
 from app.bot.router_logo import router as logo_router
 from app.bot.router_banner import router as banner_router
+from app.prewarm import prewarm_loop
+from app.media import media_gc_loop
+from app.metrics import start_metrics_server
+from app.quota import quota
+from app.uploads import upload_queue, retry_deferred_uploads, resume_interrupted_uploads
 from logging import basicConfig, INFO
 
 basicConfig(level=INFO)
 
 async def main():
+    start_chart_pool()
     init_db()
-    bot = Bot(BOT_TOKEN)
+    # Bugungi kvota sarfi (qayta ishga tushirishdan oldingisi ham) event loopdan tashqarida o'qiladi
+    await asyncio.to_thread(quota.load)
+    bot = create_bot()
     dp = Dispatcher()
     dp.include_router(base_router)
     dp.include_router(seo_router)
@@ -22,6 +32,14 @@ async def main():
     dp.include_router(statistics_router)
     dp.include_router(logo_router)
     dp.include_router(banner_router)
+    if PREWARM_ENABLED:
+        prewarm_task = asyncio.create_task(prewarm_loop())
+    upload_queue.start(bot)
+    await resume_interrupted_uploads()
+    deferred_task = asyncio.create_task(retry_deferred_uploads())
+    media_gc_task = asyncio.create_task(media_gc_loop())
+    if METRICS_PORT:
+        await start_metrics_server(METRICS_PORT)
     await dp.start_polling(bot)
 
 if __name__ == "__main__":
@@ -11,11 +11,16 @@ import uuid
 from datetime import datetime
 from app.config import OPENAI_API_KEY, KIE_API_KEY
 from PIL import Image, ImageOps
+from app.singleflight import SingleFlight
+import asyncio
 import requests
 import time
 
 router = Router()
 
+# Bir xil prompt bir vaqtda kelsa KIE'ga bitta so'rov yuboriladi
+banner_flights = SingleFlight("banner")
+
 def generate_banner(prompt: str) -> str:
     try:
         response = requests.post(
@@ -144,7 +149,7 @@ async def generate_banner_handler(callback: CallbackQuery, state: FSMContext):
         job_id = job.id
 
         try:
-            image_url = generate_banner(full_prompt)
+            image_url = await banner_flights.do(full_prompt, asyncio.to_thread, generate_banner, full_prompt)
 
             job.image_url = image_url
             job.filename = final_filename
@@ -1,9 +1,10 @@
 # app/bot/routers/base.py
-from aiogram import Router, F, Bot
+from aiogram import Router, F
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 from aiogram.filters import Command
 from aiogram.utils.markdown import html_decoration as hd
-from app.config import GOOGLE_CLIENT_ID, GOOGLE_REDIRECT_URI, YOUTUBE_SCOPES, BOT_TOKEN
+from app.config import GOOGLE_CLIENT_ID, GOOGLE_REDIRECT_URI, YOUTUBE_SCOPES
+from app.bot.client import create_bot
 from app.utils import session_scope
 from app.models import User
 from urllib.parse import quote
@@ -12,7 +13,7 @@ from datetime import datetime
 
 router = Router()
 
-bot = Bot(token=BOT_TOKEN)
+bot = create_bot()
 
 # Foydalanuvchi Google bilan ulanganligini tekshirish
 async def is_google_connected(user_id: str) -> bool:
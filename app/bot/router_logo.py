@@ -10,11 +10,16 @@ import os
 import uuid
 from datetime import datetime
 from app.config import OPENAI_API_KEY, KIE_API_KEY
+from app.singleflight import SingleFlight
+import asyncio
 import requests
 import time
 
 router = Router()
 
+# Bir xil prompt bir vaqtda kelsa KIE'ga bitta so'rov yuboriladi
+logo_flights = SingleFlight("logo")
+
 def generate_logo(prompt: str) -> str:
     try:
         response = requests.post(
@@ -144,7 +149,7 @@ async def generate_logo_handler(callback: CallbackQuery, state: FSMContext):
         job_id = job.id
         
         try:
-            image_url = generate_logo(full_prompt)
+            image_url = await logo_flights.do(full_prompt, asyncio.to_thread, generate_logo, full_prompt)
             job.image_url = image_url
             job.filename = filename
             job.status = "completed"
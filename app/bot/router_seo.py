@@ -1,30 +1,232 @@
 from aiogram import Router, F
-from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, FSInputFile
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from app.ai import gen_seo
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from app.ai import stream_seo, gen_seo_batch, normalize_topic, seo_local_results
+from app.config import SEO_EDIT_INTERVAL, SEO_BATCH_MAX_TOPICS, SEO_LATENCY_BUDGET
+from app.seo_local import local_seo
+from app.export import read_topics_xlsx, write_seo_xlsx
+from datetime import datetime
+import asyncio
+import os
+import re
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 router = Router()
 
+# "Qayta yaratish" tugmasi ishlaydigan oxirgi SEO xabarlari soni
+SEO_TOPICS_KEPT = 10
+
+# Mavzular ro'yxati yuboriladigan fayl hajmi chegarasi
+SEO_BATCH_FILE_MAX = 1024 * 1024
+
+SEO_PROMPT = (
+    "📌 Mavzuni yuboring (masalan: \"Premyera: Python FastAPI darsi 1\").\n\n"
+    "📋 Bir nechta mavzu uchun har birini yangi qatorga yozing yoki .txt/.xlsx fayl yuboring "
+    f"(ko'pi bilan {SEO_BATCH_MAX_TOPICS} ta)."
+)
+
 class SeoStates(StatesGroup):
     waiting_topic = State()
 
+def seo_text(data: dict, partial: bool = False) -> str:
+    title = data.get("title", "")
+    description = data.get("description", "")
+    tags = ", ".join(data.get("tags", []))
+    if not partial:
+        return (
+            f"🎯 Title:\n{title}\n\n"
+            f"📝 Description:\n{description}\n\n"
+            f"🏷 Tags:\n{tags}"
+        )
+    # Javob hali yozilmoqda: faqat kelgan qismlar ko'rsatiladi
+    parts = []
+    if "title" in data:
+        parts.append(f"🎯 Title:\n{title}")
+    if "description" in data:
+        parts.append(f"📝 Description:\n{description}")
+    if "tags" in data:
+        parts.append(f"🏷 Tags:\n{tags}")
+    parts.append("⏳ Yozilmoqda...")
+    return "\n\n".join(parts)
+
+def seo_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🔄 Qayta yaratish", callback_data="seo_regenerate")],
+        [InlineKeyboardButton(text="🏠 Asosiy menyu", callback_data="menu_back")]
+    ])
+
+async def edit_retrying(message: Message, text: str, **kwargs):
+    try:
+        await message.edit_text(text, **kwargs)
+    except TelegramRetryAfter as e:
+        # Yakuniy javob albatta ko'rsatilishi kerak
+        await asyncio.sleep(e.retry_after)
+        await message.edit_text(text, **kwargs)
+
+async def show_seo_stream(message: Message, topic: str, refresh: bool = False):
+    """Edits message as the SEO answer streams in, then shows the final answer.
+
+    Edits are throttled to SEO_EDIT_INTERVAL so the chat stays within
+    Telegram's edit limits; intermediate states in between are skipped.
+    If OpenAI says nothing within SEO_LATENCY_BUDGET, the local answer is
+    shown meanwhile and replaced once the AI answer is complete.
+    """
+    shown = message.text
+    next_edit = 0.0
+    stream = stream_seo(topic, refresh=refresh)
+    try:
+        first = asyncio.ensure_future(anext(stream))
+        await asyncio.wait({first}, timeout=SEO_LATENCY_BUDGET or None)
+        hedged = not first.done()
+        if hedged:
+            seo_local_results.inc(reason="slow")
+            await edit_retrying(message, seo_text(local_seo(topic)) + "\n\n⏳ AI varianti tayyorlanmoqda...")
+        # Bir qadam oldinda o'qiladi: oxirgi (to'liq) javob oraliq ko'rinishda tahrirlanmaydi,
+        # keshdan kelgan javob esa darhol bitta tahrir bilan chiqadi
+        data = await first
+        async for following in stream:
+            text = seo_text(data, partial=True)
+            data = following
+            # Lokal javob turganda chala AI javobi ko'rsatilmaydi
+            if hedged or text == shown or time.monotonic() < next_edit:
+                continue
+            try:
+                await message.edit_text(text)
+                shown = text
+                next_edit = time.monotonic() + SEO_EDIT_INTERVAL
+            except TelegramRetryAfter as e:
+                next_edit = time.monotonic() + e.retry_after
+            except TelegramBadRequest:
+                pass
+    except Exception as e:
+        logger.error(f"SEO yaratishda xato ({topic}): {e}")
+        seo_local_results.inc(reason="error")
+        data = local_seo(topic)
+    await edit_retrying(message, seo_text(data), reply_markup=seo_keyboard())
+
 # SEO tavsiyalari menyusi
 @router.callback_query(F.data == "menu_seo")
 async def seo_entry(callback: CallbackQuery, state: FSMContext):
     await state.set_state(SeoStates.waiting_topic)
     await callback.message.edit_text(
-        "📌 Mavzuni yuboring (masalan: \"Premyera: Python FastAPI darsi 1\").",
+        SEO_PROMPT,
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
         ])
     )
     await callback.answer()
 
+def split_topics(lines: list[str]) -> list[str]:
+    """Drops list markers ("1.", "-", "•") and repeated topics, keeping the order."""
+    topics = {}
+    for line in lines:
+        topic = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s+", "", line).strip()
+        if topic:
+            topics.setdefault(normalize_topic(topic), topic)
+    return list(topics.values())
+
+async def answer_retrying(m: Message, text: str, **kwargs) -> Message:
+    # Ko'p xabar ketma-ket yuborilganda Telegram kuttirib qo'yishi mumkin
+    while True:
+        try:
+            return await m.answer(text, **kwargs)
+        except TelegramRetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+
+async def upgrade_result(msg: Message, topic: str, header: str, pending: asyncio.Task) -> tuple[str, dict | None]:
+    """Replaces a local batch result with the AI one once it arrives."""
+    try:
+        data = await pending
+    except Exception:
+        return topic, None
+    try:
+        await edit_retrying(msg, f"✅ {header}\n\n{seo_text(data)}"[:4096])
+    except TelegramBadRequest:
+        pass
+    return topic, data
+
+async def run_seo_batch(m: Message, state: FSMContext, topics: list[str]):
+    """Generates SEO for every topic, posting each result as it is ready, then sends a spreadsheet."""
+    topics = split_topics(topics)
+    if not topics:
+        return await m.answer("❌ Mavzular topilmadi.")
+    skipped = len(topics) - SEO_BATCH_MAX_TOPICS
+    topics = topics[:SEO_BATCH_MAX_TOPICS]
+    await state.set_state(None)
+
+    note = f"\n⚠️ Ko'pi bilan {SEO_BATCH_MAX_TOPICS} ta mavzu olinadi, {skipped} tasi tashlab yuborildi." if skipped > 0 else ""
+    status = await m.answer(f"⏳ {len(topics)} ta mavzu uchun SEO tayyorlanmoqda...{note}")
+
+    results = {}
+    upgrades = []
+    async for topic, data, from_ai, pending in gen_seo_batch(topics):
+        results[topic] = (data, from_ai)
+        header = f"{len(results)}/{len(topics)} — {topic}"
+        if from_ai:
+            await answer_retrying(m, f"✅ {header}\n\n{seo_text(data)}"[:4096])
+        elif pending is None:
+            await answer_retrying(m, f"⚡ {header}\n\n{seo_text(data)}"[:4096])
+        else:
+            msg = await answer_retrying(m, f"⚡ {header}\n\n{seo_text(data)}\n\n⏳ AI varianti tayyorlanmoqda..."[:4096])
+            upgrades.append(asyncio.create_task(upgrade_result(msg, topic, header, pending)))
+
+    # Kechikkan AI javoblari kutiladi, xabarlar va jadval ular bilan yangilanadi
+    for topic, data in await asyncio.gather(*upgrades):
+        if data is not None:
+            results[topic] = (data, True)
+
+    local = sum(1 for _, from_ai in results.values() if not from_ai)
+    note += f"\n⚡ {local} tasi lokal variant." if local else ""
+    path = await asyncio.to_thread(write_seo_xlsx, [(topic, *results[topic]) for topic in topics])
+    try:
+        await m.answer_document(
+            FSInputFile(path, filename=f"seo_{datetime.now():%Y%m%d_%H%M}.xlsx"),
+            caption=f"📋 {len(topics)} ta mavzu uchun SEO",
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🏠 Asosiy menyu", callback_data="menu_back")]
+            ])
+        )
+    finally:
+        os.remove(path)
+    try:
+        await status.edit_text(f"✅ {len(topics)} ta mavzu tayyor.{note}")
+    except TelegramBadRequest:
+        pass
+
+@router.message(SeoStates.waiting_topic, F.document)
+async def got_topics_file(m: Message, state: FSMContext):
+    name = (m.document.file_name or "").lower()
+    if not name.endswith((".txt", ".xlsx")) or (m.document.file_size or 0) > SEO_BATCH_FILE_MAX:
+        return await m.answer(
+            "❌ Mavzular .txt yoki .xlsx faylda bo'lishi kerak (1 MB gacha).",
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
+            ])
+        )
+
+    data = (await m.bot.download(m.document)).getvalue()
+    try:
+        if name.endswith(".xlsx"):
+            topics = await asyncio.to_thread(read_topics_xlsx, data)
+        else:
+            topics = data.decode("utf-8-sig").splitlines()
+    except Exception:
+        return await m.answer("❌ Faylni o'qib bo'lmadi.")
+    await run_seo_batch(m, state, topics)
+
 @router.message(SeoStates.waiting_topic)
 async def got_topic(m: Message, state: FSMContext):
-    topic = m.text.strip()
+    lines = [line for line in (m.text or "").splitlines() if line.strip()]
+    if len(lines) > 1:
+        return await run_seo_batch(m, state, lines)
+
+    topic = (m.text or "").strip()
     if not topic:
         return await m.answer(
             "❌ Mavzu bo'sh bo'lishi mumkin emas.",
@@ -33,27 +235,30 @@ async def got_topic(m: Message, state: FSMContext):
             ])
         )
 
-    data = gen_seo(topic)
-    title = data.get("title", "")
-    description = data.get("description", "")
-    tags = ", ".join(data.get("tags", []))
+    msg = await m.answer("⏳ SEO tayyorlanmoqda...")
+    await show_seo_stream(msg, topic)
+    # Holat tugaydi, mavzu esa shu xabardagi "Qayta yaratish" tugmasi uchun saqlanadi
+    topics = (await state.get_data()).get("seo_topics", {})
+    topics[str(msg.message_id)] = topic
+    await state.set_state(None)
+    await state.set_data({"seo_topics": dict(list(topics.items())[-SEO_TOPICS_KEPT:])})
 
-    await m.answer(
-        f"🎯 Title:\n{title}\n\n"
-        f"📝 Description:\n{description}\n\n"
-        f"🏷 Tags:\n{tags}",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🏠 Asosiy menyu", callback_data="menu_back")]
-        ])
-    )
-    await state.clear()
+@router.callback_query(F.data == "seo_regenerate")
+async def seo_regenerate(callback: CallbackQuery, state: FSMContext):
+    topic = (await state.get_data()).get("seo_topics", {}).get(str(callback.message.message_id))
+    if not topic:
+        await callback.answer("Mavzuni qaytadan yuboring.", show_alert=True)
+        return
+    await callback.answer("🔄 Qayta yaratilmoqda...")
+    # Keshni chetlab o'tadi va yangi javobni keshga yozadi
+    await show_seo_stream(callback.message, topic, refresh=True)
 
 # Eski komanda ham qolsin (agar kerak bo'lsa)
 @router.message(Command("seo"))
 async def seo_command(message: Message, state: FSMContext):
     await state.set_state(SeoStates.waiting_topic)
     await message.answer(
-        "📌 Mavzuni yuboring (masalan: \"Premyera: Python FastAPI darsi 1\").",
+        SEO_PROMPT,
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
         ])
@@ -1,307 +1,160 @@
 from aiogram import Router, F
 from aiogram.filters import Command
-from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, FSInputFile, BufferedInputFile
 from app.utils import session_scope
 from app.models import User
-import datetime
-import json
-
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from app.statistics import stats_cache, format_stats, get_daily_series
+from app.charts import get_daily_chart
+from app.quota import quota, QuotaExceeded
+from app.export import write_stats_xlsx
+from datetime import datetime
+import asyncio
+import os
 
 router = Router()
 
-def get_youtube_service(user):
-    creds = Credentials.from_authorized_user_info(json.loads(user.google_token_json))
-    return build("youtube", "v3", credentials=creds)
+QUOTA_TEXT = "⏳ YouTube API kunlik limiti tugadi. Statistikani birozdan keyin yangilab ko'ring."
 
-def get_analytics_service(user):
-    creds = Credentials.from_authorized_user_info(json.loads(user.google_token_json))
-    return build("youtubeAnalytics", "v2", credentials=creds)
+def get_user_token(tg_id: str) -> tuple[int, str] | None:
+    with session_scope() as db:
+        user = db.query(User).filter(User.tg_id == tg_id).first()
+        if not user or not user.google_token_json:
+            return None
+        # Prewarm shu vaqt bo'yicha faol foydalanuvchilarni tanlaydi
+        user.last_active_at = datetime.now()
+        return user.id, user.google_token_json
+
+def stats_keyboard():
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🔄 Yangilash", callback_data="menu_statistics")],
+        [
+            InlineKeyboardButton(text="📈 Grafik", callback_data="statistics_chart"),
+            InlineKeyboardButton(text="📥 Excel", callback_data="statistics_export")
+        ],
+        [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
+    ])
 
 # Statistika menyusi
 @router.callback_query(F.data == "menu_statistics")
 async def statistics_callback(callback: CallbackQuery):
-    with session_scope() as db:
-        user = db.query(User).filter(User.tg_id == str(callback.from_user.id)).first()
-        if not user or not user.google_token_json:
-            return await callback.message.edit_text(
-                "❌ Google ulanmagan. Avval Google hisobingizni ulang.",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="🔗 Google Ulash", callback_data="menu_connect")],
-                    [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
-                ])
-            )
-
-        await callback.message.edit_text("📊 Ma'lumotlar yuklanmoqda, iltimos kuting...")
-
-        yt = get_youtube_service(user)
-        ya = get_analytics_service(user)
-
-        channel_resp = yt.channels().list(
-            part="snippet,statistics,contentDetails",
-            mine=True
-        ).execute()
-
-        if not channel_resp["items"]:
-            return await callback.message.edit_text(
-                "❌ Kanal topilmadi.",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
-                ])
-            )
-
-        channel = channel_resp["items"][0]
-        title = channel["snippet"]["title"]
-        subs = channel["statistics"].get("subscriberCount", "0")
-        views = channel["statistics"].get("viewCount", "0")
-        videos_count = channel["statistics"].get("videoCount", "0")
-
-        total_likes = 0
-        total_comments = 0
-        next_page = None
-        while True:
-            vids = yt.search().list(
-                part="id",
-                channelId=channel["id"],
-                maxResults=50,
-                pageToken=next_page,
-                type="video"
-            ).execute()
-
-            if not vids.get("items"):
-                break
-
-            video_ids = [v["id"]["videoId"] for v in vids["items"]]
-            stats_resp = yt.videos().list(
-                part="statistics",
-                id=",".join(video_ids)
-            ).execute()
-
-            for item in stats_resp.get("items", []):
-                total_likes += int(item["statistics"].get("likeCount", 0))
-                total_comments += int(item["statistics"].get("commentCount", 0))
-
-            next_page = vids.get("nextPageToken")
-            if not next_page:
-                break
-
-        end_date = datetime.date.today()
-        start_date = end_date - datetime.timedelta(days=28)
-
-        analytics_resp = ya.reports().query(
-            ids="channel==MINE",
-            startDate=start_date.isoformat(),
-            endDate=end_date.isoformat(),
-            metrics="views,estimatedMinutesWatched,subscribersGained,subscribersLost,likes",
-            dimensions="day",
-            sort="day"
-        ).execute()
-
-        total_views_28 = 0
-        total_minutes_28 = 0
-        gained_28 = 0
-        lost_28 = 0
-        likes_28 = 0
-
-        if "rows" in analytics_resp:
-            for r in analytics_resp["rows"]:
-                total_views_28 += int(r[1])
-                total_minutes_28 += int(r[2])
-                gained_28 += int(r[3])
-                lost_28 += int(r[4])
-                likes_28 += int(r[5])
-
-        uploads_playlist = channel["contentDetails"]["relatedPlaylists"]["uploads"]
-        playlist_items = yt.playlistItems().list(
-            part="snippet",
-            playlistId=uploads_playlist,
-            maxResults=5
-        ).execute()
-
-        video_ids = [item["snippet"]["resourceId"]["videoId"] for item in playlist_items["items"]]
-
-        stats_resp = yt.videos().list(
-            part="snippet,statistics",
-            id=",".join(video_ids)
-        ).execute()
-
-        video_stats = []
-        for item in stats_resp["items"]:
-            v_title = item["snippet"]["title"]
-            v_views = item["statistics"].get("viewCount", "0")
-            v_likes = item["statistics"].get("likeCount", "0")
-            v_comments = item["statistics"].get("commentCount", "0")
-            video_stats.append(f"🎬 {v_title}\n👁 {v_views} | 👍 {v_likes} | 💬 {v_comments}")
-
-        text = (
-            f"📊 *Kanal statistikasi*\n"
-            f"📌 Nomi: {title}\n"
-            f"👥 Obunachilar: {subs}\n"
-            f"👁 Ko'rishlar: {views}\n"
-            f"🎞 Videolar soni: {videos_count}\n"
-            f"👍 Umumiy layklar: {total_likes}\n"
-            f"💬 Umumiy kommentlar: {total_comments}\n\n"
-            f"📈 *So'nggi 28 kun*\n"
-            f"👁 Ko'rishlar: {total_views_28}\n"
-            f"⏳ Tomosha vaqti: {total_minutes_28} daqiqa\n"
-            f"📈 Obunachilar qo'shildi: {gained_28}\n"
-            f"📉 Obunachilar ketdi: {lost_28}\n"
-            f"👍 Layklar: {likes_28}\n\n"
+    account = get_user_token(str(callback.from_user.id))
+    if not account:
+        return await callback.message.edit_text(
+            "❌ Google ulanmagan. Avval Google hisobingizni ulang.",
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🔗 Google Ulash", callback_data="menu_connect")],
+                [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
+            ])
         )
 
-        if video_stats:
-            text += "🆕 *So'nggi 5 video (real-time)*:\n" + "\n\n".join(video_stats)
+    await callback.message.edit_text("📊 Ma'lumotlar yuklanmoqda, iltimos kuting...")
 
-        await callback.message.edit_text(
-            text, 
-            parse_mode="Markdown",
+    try:
+        cached = await stats_cache.get(*account)
+    except QuotaExceeded:
+        return await callback.message.edit_text(QUOTA_TEXT, reply_markup=stats_keyboard())
+    if cached is None:
+        return await callback.message.edit_text(
+            "❌ Kanal topilmadi.",
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔄 Yangilash", callback_data="menu_statistics")],
                 [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
             ])
         )
+
+    await callback.message.edit_text(
+        format_stats(*cached),
+        parse_mode="Markdown",
+        reply_markup=stats_keyboard()
+    )
     await callback.answer()
 
 # Eski komanda ham qolsin (agar kerak bo'lsa)
 @router.message(Command("statistics"))
 async def statistics_cmd(m: Message):
-    with session_scope() as db:
-        user = db.query(User).filter(User.tg_id == str(m.from_user.id)).first()
-        if not user or not user.google_token_json:
-            return await m.answer(
-                "❌ Google ulanmagan. Avval /connect buyrug'ini bosing.",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="🔗 Google Ulash", callback_data="menu_connect")],
-                    [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
-                ])
-            )
-
-        await m.answer("📊 Ma'lumotlar yuklanmoqda, iltimos kuting...")
-
-        yt = get_youtube_service(user)
-        ya = get_analytics_service(user)
-
-        channel_resp = yt.channels().list(
-            part="snippet,statistics,contentDetails",
-            mine=True
-        ).execute()
-
-        if not channel_resp["items"]:
-            return await m.answer(
-                "❌ Kanal topilmadi.",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
-                ])
-            )
-
-        channel = channel_resp["items"][0]
-        title = channel["snippet"]["title"]
-        subs = channel["statistics"].get("subscriberCount", "0")
-        views = channel["statistics"].get("viewCount", "0")
-        videos_count = channel["statistics"].get("videoCount", "0")
-
-        total_likes = 0
-        total_comments = 0
-        next_page = None
-        while True:
-            vids = yt.search().list(
-                part="id",
-                channelId=channel["id"],
-                maxResults=50,
-                pageToken=next_page,
-                type="video"
-            ).execute()
-
-            if not vids.get("items"):
-                break
-
-            video_ids = [v["id"]["videoId"] for v in vids["items"]]
-            stats_resp = yt.videos().list(
-                part="statistics",
-                id=",".join(video_ids)
-            ).execute()
-
-            for item in stats_resp.get("items", []):
-                total_likes += int(item["statistics"].get("likeCount", 0))
-                total_comments += int(item["statistics"].get("commentCount", 0))
-
-            next_page = vids.get("nextPageToken")
-            if not next_page:
-                break
-
-        end_date = datetime.date.today()
-        start_date = end_date - datetime.timedelta(days=28)
-
-        analytics_resp = ya.reports().query(
-            ids="channel==MINE",
-            startDate=start_date.isoformat(),
-            endDate=end_date.isoformat(),
-            metrics="views,estimatedMinutesWatched,subscribersGained,subscribersLost,likes",
-            dimensions="day",
-            sort="day"
-        ).execute()
-
-        total_views_28 = 0
-        total_minutes_28 = 0
-        gained_28 = 0
-        lost_28 = 0
-        likes_28 = 0
-
-        if "rows" in analytics_resp:
-            for r in analytics_resp["rows"]:
-                total_views_28 += int(r[1])
-                total_minutes_28 += int(r[2])
-                gained_28 += int(r[3])
-                lost_28 += int(r[4])
-                likes_28 += int(r[5])
-
-        uploads_playlist = channel["contentDetails"]["relatedPlaylists"]["uploads"]
-        playlist_items = yt.playlistItems().list(
-            part="snippet",
-            playlistId=uploads_playlist,
-            maxResults=5
-        ).execute()
-
-        video_ids = [item["snippet"]["resourceId"]["videoId"] for item in playlist_items["items"]]
-
-        stats_resp = yt.videos().list(
-            part="snippet,statistics",
-            id=",".join(video_ids)
-        ).execute()
-
-        video_stats = []
-        for item in stats_resp["items"]:
-            v_title = item["snippet"]["title"]
-            v_views = item["statistics"].get("viewCount", "0")
-            v_likes = item["statistics"].get("likeCount", "0")
-            v_comments = item["statistics"].get("commentCount", "0")
-            video_stats.append(f"🎬 {v_title}\n👁 {v_views} | 👍 {v_likes} | 💬 {v_comments}")
-
-        text = (
-            f"📊 *Kanal statistikasi*\n"
-            f"📌 Nomi: {title}\n"
-            f"👥 Obunachilar: {subs}\n"
-            f"👁 Ko'rishlar: {views}\n"
-            f"🎞 Videolar soni: {videos_count}\n"
-            f"👍 Umumiy layklar: {total_likes}\n"
-            f"💬 Umumiy kommentlar: {total_comments}\n\n"
-            f"📈 *So'nggi 28 kun*\n"
-            f"👁 Ko'rishlar: {total_views_28}\n"
-            f"⏳ Tomosha vaqti: {total_minutes_28} daqiqa\n"
-            f"📈 Obunachilar qo'shildi: {gained_28}\n"
-            f"📉 Obunachilar ketdi: {lost_28}\n"
-            f"👍 Layklar: {likes_28}\n\n"
+    account = get_user_token(str(m.from_user.id))
+    if not account:
+        return await m.answer(
+            "❌ Google ulanmagan. Avval /connect buyrug'ini bosing.",
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🔗 Google Ulash", callback_data="menu_connect")],
+                [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
+            ])
         )
 
-        if video_stats:
-            text += "🆕 *So'nggi 5 video (real-time)*:\n" + "\n\n".join(video_stats)
+    await m.answer("📊 Ma'lumotlar yuklanmoqda, iltimos kuting...")
 
-        await m.answer(
-            text, 
-            parse_mode="Markdown",
+    try:
+        cached = await stats_cache.get(*account)
+    except QuotaExceeded:
+        return await m.answer(QUOTA_TEXT, reply_markup=stats_keyboard())
+    if cached is None:
+        return await m.answer(
+            "❌ Kanal topilmadi.",
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔄 Yangilash", callback_data="menu_statistics")],
                 [InlineKeyboardButton(text="🔙 Orqaga", callback_data="menu_back")]
             ])
-        )
\ No newline at end of file
+        )
+
+    await m.answer(
+        format_stats(*cached),
+        parse_mode="Markdown",
+        reply_markup=stats_keyboard()
+    )
+
+# Statistikani Excel faylga eksport qilish
+@router.callback_query(F.data == "statistics_export")
+async def statistics_export(callback: CallbackQuery):
+    account = get_user_token(str(callback.from_user.id))
+    if not account:
+        return await callback.answer("❌ Google ulanmagan.", show_alert=True)
+
+    await callback.answer("📥 Fayl tayyorlanmoqda...")
+    try:
+        # Jadval ma'lumotlari bo'sh bo'lsa, avval statistikani yig'ib olamiz
+        await stats_cache.get(*account)
+    except QuotaExceeded:
+        pass
+
+    path = await asyncio.to_thread(write_stats_xlsx, account[0])
+    try:
+        await callback.message.answer_document(
+            FSInputFile(path, filename=f"statistika_{datetime.now():%Y%m%d}.xlsx"),
+            caption="📊 Videolar va kunlik ko'rsatkichlar"
+        )
+    finally:
+        os.remove(path)
+
+# So'nggi 28 kunlik grafik
+@router.callback_query(F.data == "statistics_chart")
+async def statistics_chart(callback: CallbackQuery):
+    account = get_user_token(str(callback.from_user.id))
+    if not account:
+        return await callback.answer("❌ Google ulanmagan.", show_alert=True)
+
+    await callback.answer("📈 Grafik chizilmoqda...")
+    try:
+        await stats_cache.get(*account)
+    except QuotaExceeded:
+        pass
+
+    rows = await asyncio.to_thread(get_daily_series, account[0])
+    if not rows:
+        return await callback.message.answer("❌ Grafik uchun ma'lumot yo'q.")
+
+    png = await get_daily_chart(rows)
+    await callback.message.answer_photo(
+        BufferedInputFile(png, filename="grafik.png"),
+        caption=f"📈 So'nggi 28 kun ({rows[0][0]} - {rows[-1][0]})"
+    )
+
+@router.message(Command("quota"))
+async def quota_cmd(m: Message):
+    account = get_user_token(str(m.from_user.id))
+    user_id = account[0] if account else None
+    text = (
+        f"📦 *YouTube API kvotasi (bugun)*\n"
+        f"🌐 Umumiy qoldiq: {quota.remaining()} birlik\n"
+    )
+    if user_id is not None:
+        text += f"👤 Sizning qoldig'ingiz: {quota.remaining(user_id=user_id)} birlik\n"
+    await m.answer(text, parse_mode="Markdown")
@@ -0,0 +1,111 @@
+import asyncio
+import io
+import json
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.config import CHART_WORKERS, CHART_CACHE_SIZE
+
+WIDTH = 1200
+PANEL_HEIGHT = 280
+MARGIN = 60
+BACKGROUND = (20, 20, 20)
+GRID = (60, 60, 60)
+TEXT = (230, 230, 230)
+
+# Render CPU talab qiladi, shuning uchun alohida jarayonlarda bajariladi.
+# "spawn": fork threadlar ushlab turgan qulflarni ham nusxalaydi va ishchi osilib qolishi mumkin.
+_pool: ProcessPoolExecutor | None = None
+_cache: OrderedDict[str, bytes] = OrderedDict()
+_pending: dict[str, asyncio.Future] = {}
+
+
+def _draw_panel(draw, font, top: int, title: str, days: list[str], series: list[tuple[list[int], tuple, str]]):
+    left, right = MARGIN, WIDTH - MARGIN // 2
+    bottom = top + PANEL_HEIGHT - 40
+    plot_top = top + 30
+    draw.text((left, top + 5), title, fill=TEXT, font=font)
+
+    peak = max([max(values, default=0) for values, _, _ in series] + [1])
+    for i in range(5):
+        y = bottom - (bottom - plot_top) * i // 4
+        draw.line([(left, y), (right, y)], fill=GRID)
+        draw.text((5, y - 6), str(peak * i // 4), fill=TEXT, font=font)
+
+    count = max(len(days), 1)
+    step = (right - left) / max(count - 1, 1)
+    bar_width = max(int(step / (len(series) + 1)), 1)
+    for n, (values, color, kind) in enumerate(series):
+        points = [
+            (left + i * step, bottom - (bottom - plot_top) * v / peak)
+            for i, v in enumerate(values)
+        ]
+        if kind == "bar":
+            for x, y in points:
+                x0 = x + (n - len(series) / 2) * bar_width
+                draw.rectangle([(x0, y), (x0 + bar_width - 1, bottom)], fill=color)
+        elif len(points) > 1:
+            draw.line(points, fill=color, width=3)
+
+    if days:
+        draw.text((left, bottom + 8), days[0], fill=TEXT, font=font)
+        bbox = draw.textbbox((0, 0), days[-1], font=font)
+        draw.text((right - (bbox[2] - bbox[0]), bottom + 8), days[-1], fill=TEXT, font=font)
+
+
+def render_daily_chart(rows: list[list]) -> bytes:
+    """Renders [day, views, minutes, gained, lost] rows into a PNG image."""
+    days = [r[0] for r in rows]
+    views = [r[1] for r in rows]
+    minutes = [r[2] for r in rows]
+    gained = [r[3] for r in rows]
+    lost = [r[4] for r in rows]
+
+    img = Image.new("RGB", (WIDTH, PANEL_HEIGHT * 3), BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+
+    _draw_panel(draw, font, 0, "Ko'rishlar", days, [(views, (66, 133, 244), "line")])
+    _draw_panel(draw, font, PANEL_HEIGHT, "Tomosha vaqti (daqiqa)", days, [(minutes, (251, 188, 5), "line")])
+    _draw_panel(draw, font, PANEL_HEIGHT * 2, "Obunachilar: qo'shildi / ketdi", days, [
+        (gained, (52, 168, 83), "bar"),
+        (lost, (234, 67, 53), "bar"),
+    ])
+
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def start_chart_pool() -> ProcessPoolExecutor:
+    """Creates the render process pool; called once at startup."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=CHART_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def get_daily_chart(rows: list[list]) -> bytes:
+    """Returns the PNG for the series, rendering it at most once per content hash."""
+    key = sha256(json.dumps(rows, default=str).encode()).hexdigest()
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    if key in _pending:
+        return await _pending[key]
+
+    future = asyncio.get_running_loop().run_in_executor(start_chart_pool(), render_daily_chart, rows)
+    _pending[key] = future
+    try:
+        png = await future
+    finally:
+        _pending.pop(key, None)
+
+    _cache[key] = png
+    while len(_cache) > CHART_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return png
@@ -19,4 +19,108 @@ YOUTUBE_SCOPES = [
     "https://www.googleapis.com/auth/yt-analytics.readonly",
     "https://www.googleapis.com/auth/youtube.force-ssl",
     "https://www.googleapis.com/auth/youtube.upload"
-]
\ No newline at end of file
+]
+
+# Statistika so'rovlari uchun thread pool hajmi
+STATS_WORKERS = int(os.getenv("STATS_WORKERS", "16"))
+
+# Statistika keshi: TTL (soniya), xotiradagi kanallar soni, Postgres'da saqlash
+STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "600"))
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "1000"))
+STATS_CACHE_PERSIST = os.getenv("STATS_CACHE_PERSIST", "1") == "1"
+
+# Video hisoblagichlari: shu kundan yangi videolar har safar yangilanadi,
+# qolganlari esa STATS_VIDEO_REFRESH_HOURS dan keyin navbat bilan (har safar ko'pi bilan STATS_VIDEO_REFRESH_BATCH ta)
+STATS_RECENT_DAYS = int(os.getenv("STATS_RECENT_DAYS", "30"))
+STATS_VIDEO_REFRESH_HOURS = int(os.getenv("STATS_VIDEO_REFRESH_HOURS", "24"))
+STATS_VIDEO_REFRESH_BATCH = int(os.getenv("STATS_VIDEO_REFRESH_BATCH", "200"))
+
+# Har xil Google hisoblari uchun keshlanadigan service obyektlari soni
+GOOGLE_SERVICE_CACHE_SIZE = int(os.getenv("GOOGLE_SERVICE_CACHE_SIZE", "256"))
+
+# Statistikani oldindan isitish (prewarm): sikl oralig'i (soniya), faol foydalanuvchi
+# oynasi (kun), bir siklda sarflanadigan kvota birliklari va kunlik kvotaning
+# prewarm tegmaydigan qismi
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "1") == "1"
+PREWARM_INTERVAL = int(os.getenv("PREWARM_INTERVAL", "900"))
+PREWARM_ACTIVE_DAYS = int(os.getenv("PREWARM_ACTIVE_DAYS", "7"))
+PREWARM_QUOTA_BUDGET = int(os.getenv("PREWARM_QUOTA_BUDGET", "500"))
+PREWARM_MIN_QUOTA_SHARE = float(os.getenv("PREWARM_MIN_QUOTA_SHARE", "0.3"))
+
+# YouTube Analytics kunlik qatorlari: oxirgi STATS_SETTLE_DAYS kun hali o'zgarib
+# turadi va har safar qayta so'raladi, STATS_WINDOWS esa ko'rsatiladigan oraliqlar
+STATS_SETTLE_DAYS = int(os.getenv("STATS_SETTLE_DAYS", "3"))
+STATS_WINDOWS = [int(d) for d in os.getenv("STATS_WINDOWS", "7,28,90,365").split(",")]
+
+# Google loyihasining kunlik kvotasi (YouTube Data va Analytics API) va bitta
+# foydalanuvchi sarflashi mumkin bo'lgan ulush
+YT_DAILY_QUOTA = int(os.getenv("YT_DAILY_QUOTA", "10000"))
+YTA_DAILY_QUOTA = int(os.getenv("YTA_DAILY_QUOTA", "100000"))
+YT_USER_QUOTA_SHARE = float(os.getenv("YT_USER_QUOTA_SHARE", "0.5"))
+
+# Kvota yetmagani uchun kechiktirilgan yuklashlarni qayta tekshirish oralig'i (soniya)
+DEFERRED_RETRY_INTERVAL = int(os.getenv("DEFERRED_RETRY_INTERVAL", "600"))
+
+# Grafiklar: render jarayonlari soni va xotirada saqlanadigan rasmlar soni
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "256"))
+
+# Video yuklash: Telegram'dan kelayotgan baytlarni diskka yozmasdan to'g'ridan-to'g'ri
+# YouTube'ga uzatish, bo'lak o'lchami (256 KB ga karrali) va xotiradagi bufer chegarasi
+UPLOAD_STREAMING = os.getenv("UPLOAD_STREAMING", "0") == "1"
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_BUFFER_SIZE = int(os.getenv("UPLOAD_BUFFER_SIZE", str(32 * 1024 * 1024)))
+UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "8"))
+TELEGRAM_DOWNLOAD_TIMEOUT = int(os.getenv("TELEGRAM_DOWNLOAD_TIMEOUT", "3600"))
+
+# Yuklash navbati: bir vaqtda jami nechta va bitta foydalanuvchidan nechta video
+# yuklanishi hamda progress xabarini yangilash oralig'i (soniya)
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+UPLOAD_USER_CONCURRENCY = int(os.getenv("UPLOAD_USER_CONCURRENCY", "1"))
+UPLOAD_PROGRESS_INTERVAL = int(os.getenv("UPLOAD_PROGRESS_INTERVAL", "5"))
+
+# Mavzu kelganda oldindan boshlangan SEO so'rovi shu vaqt (soniya) ichida video
+# kelmasa tashlab yuboriladi
+SEO_TASK_TTL = int(os.getenv("SEO_TASK_TTL", "3600"))
+
+# Media ombori: fayllar kontent xeshi bo'yicha saqlanadi; tugagan yoki
+# MEDIA_RETENTION_DAYS kundan eski joblarning fayllari GC tomonidan o'chiriladi
+MEDIA_DIR = os.getenv("MEDIA_DIR", "media")
+MEDIA_RETENTION_DAYS = int(os.getenv("MEDIA_RETENTION_DAYS", "7"))
+MEDIA_GC_INTERVAL = int(os.getenv("MEDIA_GC_INTERVAL", "3600"))
+MEDIA_GC_GRACE = int(os.getenv("MEDIA_GC_GRACE", "3600"))
+
+# Bot jarayonining /metrics porti (bo'sh bo'lsa o'chirilgan)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# O'zimizning Telegram Bot API serverimiz (bo'sh bo'lsa - api.telegram.org). Lokal
+# rejimda getFile fayl yo'lini qaytaradi; bot bu papkani boshqa yo'lda ko'rsa,
+# TELEGRAM_API_FILES_DIR -> TELEGRAM_API_LOCAL_FILES_DIR ga almashtiriladi
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+TELEGRAM_API_LOCAL = os.getenv("TELEGRAM_API_LOCAL", "1") == "1"
+TELEGRAM_API_FILES_DIR = os.getenv("TELEGRAM_API_FILES_DIR", "")
+TELEGRAM_API_LOCAL_FILES_DIR = os.getenv("TELEGRAM_API_LOCAL_FILES_DIR", "")
+
+# OpenAI: so'rov va ulanish uchun vaqt chegarasi (soniya), qayta urinishlar soni
+# va umumiy HTTP havzasidagi ulanishlar soni
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+
+# SEO natijalari keshi: amal qilish muddati (soniya), xotiradagi yozuvlar soni,
+# Postgres'da saqlash
+SEO_CACHE_TTL = int(os.getenv("SEO_CACHE_TTL", str(7 * 24 * 3600)))
+SEO_CACHE_SIZE = int(os.getenv("SEO_CACHE_SIZE", "2000"))
+SEO_CACHE_PERSIST = os.getenv("SEO_CACHE_PERSIST", "1") == "1"
+
+# SEO javobi yozilayotganda xabar ko'pi bilan shuncha soniyada bir marta tahrirlanadi
+SEO_EDIT_INTERVAL = float(os.getenv("SEO_EDIT_INTERVAL", "1.5"))
+
+# Bir nechta mavzu uchun SEO: bir vaqtda nechta so'rov, bitta so'rovdagi mavzular chegarasi
+SEO_BATCH_CONCURRENCY = int(os.getenv("SEO_BATCH_CONCURRENCY", "5"))
+SEO_BATCH_MAX_TOPICS = int(os.getenv("SEO_BATCH_MAX_TOPICS", "50"))
+
+# OpenAI javobi shuncha soniyada kelmasa lokal SEO ko'rsatiladi, AI javobi kelganda
+# almashtiriladi (0 - kutish cheklanmaydi)
+SEO_LATENCY_BUDGET = float(os.getenv("SEO_LATENCY_BUDGET", "8"))
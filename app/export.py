@@ -0,0 +1,85 @@
+import os
+import tempfile
+from io import BytesIO
+
+from openpyxl import Workbook, load_workbook
+
+from app.models import ChannelVideo, ChannelDailyMetric
+from app.statistics import current_channel_id
+from app.utils import session_scope
+
+# Server tomonidagi kursor orqali qatorlarni shu o'lchamdagi bo'laklarda o'qiymiz
+EXPORT_CHUNK = 1000
+
+
+def write_stats_xlsx(user_id: int) -> str:
+    """Blocking: writes per-video and per-day stats of the user's current channel to a temporary .xlsx file.
+
+    Rows are streamed from the database into a write-only workbook, so memory
+    use does not grow with the channel size. The caller removes the file.
+    """
+    wb = Workbook(write_only=True)
+
+    videos = wb.create_sheet("Videolar")
+    videos.append(["Video ID", "Nomi", "Chop etilgan", "Ko'rishlar", "Layklar", "Kommentlar", "Yangilangan"])
+
+    days = wb.create_sheet("Kunlik")
+    days.append(["Kun", "Ko'rishlar", "Tomosha (daqiqa)", "Obuna +", "Obuna -", "Layklar"])
+
+    with session_scope() as db:
+        # Boshqa kanal ulangan bo'lsa eski kanal qatorlari aralashmasin
+        channel_id = current_channel_id(db, user_id)
+        rows = db.query(
+            ChannelVideo.video_id, ChannelVideo.title, ChannelVideo.published_at,
+            ChannelVideo.view_count, ChannelVideo.like_count, ChannelVideo.comment_count,
+            ChannelVideo.updated_at
+        ).filter(ChannelVideo.channel_id == channel_id) \
+            .order_by(ChannelVideo.published_at.desc().nullslast()) \
+            .yield_per(EXPORT_CHUNK)
+        for row in rows:
+            videos.append(list(row))
+
+        rows = db.query(
+            ChannelDailyMetric.day, ChannelDailyMetric.views, ChannelDailyMetric.minutes_watched,
+            ChannelDailyMetric.subscribers_gained, ChannelDailyMetric.subscribers_lost,
+            ChannelDailyMetric.likes
+        ).filter(ChannelDailyMetric.channel_id == channel_id) \
+            .order_by(ChannelDailyMetric.day) \
+            .yield_per(EXPORT_CHUNK)
+        for row in rows:
+            days.append(list(row))
+
+    fd, path = tempfile.mkstemp(prefix="stats_", suffix=".xlsx")
+    os.close(fd)
+    wb.save(path)
+    return path
+
+
+def read_topics_xlsx(data: bytes) -> list[str]:
+    """Blocking: topics from the first column of the first sheet."""
+    wb = load_workbook(BytesIO(data), read_only=True)
+    try:
+        topics = [str(row[0]).strip() for row in wb.worksheets[0].iter_rows(values_only=True) if row and row[0] is not None]
+    finally:
+        wb.close()
+    # Sarlavha qatori bo'lsa tashlab yuboriladi
+    if topics and topics[0].lower() in ("mavzu", "mavzular", "topic", "topics"):
+        topics = topics[1:]
+    return [topic for topic in topics if topic]
+
+
+def write_seo_xlsx(rows: list[tuple[str, dict, bool]]) -> str:
+    """Blocking: writes (topic, seo, from_ai) rows to a temporary .xlsx file. The caller removes the file."""
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet("SEO")
+    sheet.append(["Mavzu", "Title", "Description", "Tags", "Manba"])
+    for topic, data, from_ai in rows:
+        sheet.append([
+            topic, data.get("title"), data.get("description"), ", ".join(data.get("tags", [])),
+            "AI" if from_ai else "Lokal"
+        ])
+
+    fd, path = tempfile.mkstemp(prefix="seo_", suffix=".xlsx")
+    os.close(fd)
+    wb.save(path)
+    return path
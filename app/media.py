@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from hashlib import sha256
+
+from app.config import MEDIA_DIR, MEDIA_RETENTION_DAYS, MEDIA_GC_INTERVAL, MEDIA_GC_GRACE
+from app.metrics import counter, gauge
+from app.models import VideoJob, LogoJob, BannerJob
+from app.utils import session_scope
+
+logger = logging.getLogger(__name__)
+
+# Eski nomlangan fayllar ham shu papkalarda qolgan - GC ularni ham ko'radi
+LEGACY_DIRS = ("uploads", "logos", "banners")
+
+# Hali yuklanmagan videolar: fayli va muqovasi saqlanib turadi
+ACTIVE_VIDEO_STATUSES = ("draft", "queued", "uploading", "deferred")
+
+media_bytes = gauge("media_disk_bytes", "Bytes stored under a media directory")
+media_files = gauge("media_disk_files", "Files stored under a media directory")
+dedup_hits = counter("media_dedup_hits_total", "Stored files that were already in the store")
+dedup_saved = counter("media_dedup_saved_bytes_total", "Bytes not written again thanks to deduplication")
+gc_files = counter("media_gc_deleted_files_total", "Files removed by the media garbage collector")
+gc_bytes = counter("media_gc_freed_bytes_total", "Bytes freed by the media garbage collector")
+
+
+def file_digest(path: str) -> str:
+    h = sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def blob_path(digest: str, ext: str) -> str:
+    return os.path.join(MEDIA_DIR, digest[:2], digest + ext)
+
+
+def blob_digest(path: str) -> str:
+    """Content hash of a file stored with put_file."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def temp_path(ext: str) -> str:
+    """Where to write a file before it is added with put_file."""
+    os.makedirs(os.path.join(MEDIA_DIR, "tmp"), exist_ok=True)
+    return os.path.join(MEDIA_DIR, "tmp", uuid.uuid4().hex + ext)
+
+
+def put_file(src: str, ext: str | None = None) -> str:
+    """Moves src into the store under its content hash and returns the new path.
+
+    If the same content is already stored, src is deleted and the existing
+    blob is returned, so identical files take disk space only once.
+    """
+    if ext is None:
+        ext = os.path.splitext(src)[1]
+    dst = blob_path(file_digest(src), ext)
+    if os.path.exists(dst):
+        size = os.path.getsize(src)
+        os.remove(src)
+        dedup_hits.inc()
+        dedup_saved.inc(size)
+        # GC grace muddati mavjud blob uchun ham qaytadan boshlansin
+        os.utime(dst)
+        return dst
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    os.replace(src, dst)
+    return dst
+
+
+def link_file(src: str, ext: str | None = None) -> tuple[str, str]:
+    """Adds a file owned by someone else (e.g. the local Bot API server) without copying it.
+
+    Returns the path to use and the content hash. The blob is a hardlink to
+    src, so it survives the server cleaning up its own files; if a hardlink
+    is impossible (another filesystem), src itself is used in place.
+    """
+    if ext is None:
+        ext = os.path.splitext(src)[1]
+    digest = file_digest(src)
+    dst = blob_path(digest, ext)
+    if os.path.exists(dst):
+        dedup_hits.inc()
+        dedup_saved.inc(os.path.getsize(src))
+        os.utime(dst)
+        return dst, digest
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        logger.warning(f"Hardlink yaratilmadi, fayl joyida ishlatiladi ({src}): {e}")
+        return src, digest
+    return dst, digest
+
+
+def live_references() -> set[str]:
+    """Paths still needed by a job that is not finished and is within retention."""
+    cutoff = datetime.now() - timedelta(days=MEDIA_RETENTION_DAYS)
+    refs = set()
+    with session_scope() as db:
+        for file_path, thumbnail_path in (
+            db.query(VideoJob.file_path, VideoJob.thumbnail_path)
+            .filter(VideoJob.status.in_(ACTIVE_VIDEO_STATUSES), VideoJob.created_at >= cutoff)
+        ):
+            refs.update((file_path, thumbnail_path))
+        for model in (LogoJob, BannerJob):
+            for (filename,) in db.query(model.filename).filter(model.status != "failed", model.created_at >= cutoff):
+                refs.add(filename)
+    return {os.path.normpath(p) for p in refs if p}
+
+
+def _walk(root: str):
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            yield os.path.join(dirpath, name)
+
+
+def collect_garbage() -> tuple[int, int]:
+    """Deletes unreferenced files and returns (files, bytes) removed.
+
+    A file is kept while a live job references it. Files modified within
+    MEDIA_GC_GRACE seconds are kept as well: they may still be being
+    written, or their job may not have been committed yet.
+    """
+    refs = live_references()
+    now = time.time()
+    removed = freed = 0
+    for root in (MEDIA_DIR, *LEGACY_DIRS):
+        for path in _walk(root):
+            if os.path.normpath(path) in refs:
+                continue
+            try:
+                stat = os.stat(path)
+                if now - stat.st_mtime < MEDIA_GC_GRACE:
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += stat.st_size
+    gc_files.inc(removed)
+    gc_bytes.inc(freed)
+    return removed, freed
+
+
+def update_disk_usage() -> dict[str, tuple[int, int]]:
+    usage = {}
+    for root in (MEDIA_DIR, *LEGACY_DIRS):
+        files = size = 0
+        for path in _walk(root):
+            try:
+                size += os.path.getsize(path)
+                files += 1
+            except FileNotFoundError:
+                continue
+        media_files.set(files, dir=root)
+        media_bytes.set(size, dir=root)
+        usage[root] = (files, size)
+    return usage
+
+
+async def media_gc_loop():
+    while True:
+        try:
+            removed, freed = await asyncio.to_thread(collect_garbage)
+            if removed:
+                logger.info(f"Media GC: {removed} ta fayl o'chirildi, {freed / (1024 * 1024):.1f} MB bo'shadi")
+            await asyncio.to_thread(update_disk_usage)
+        except Exception as e:
+            logger.error(f"Media GC xatosi: {e}")
+        await asyncio.sleep(MEDIA_GC_INTERVAL)
@@ -0,0 +1,108 @@
+"""In-process counters and gauges, served in the Prometheus text format."""
+import threading
+
+from aiohttp import web
+
+
+class Metric:
+    def __init__(self, name: str, help: str, kind: str):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = ",".join(f'{k}="{v}"' for k, v in key)
+                lines.append(f"{self.name}{{{labels}}} {value}" if labels else f"{self.name} {value}")
+        return lines
+
+
+class Histogram(Metric):
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...]):
+        super().__init__(name, help, "histogram")
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # har bir bucket uchun son, keyin umumiy son va yig'indi
+            counts = self._values.setdefault(key, [0] * len(self.buckets) + [0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, counts in sorted(self._values.items()):
+                labels = [f'{k}="{v}"' for k, v in key]
+                bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, counts[:-2] + [counts[-2]]):
+                    le = ",".join(labels + [f'le="{bound}"'])
+                    lines.append(f"{self.name}_bucket{{{le}}} {count}")
+                suffix = "{" + ",".join(labels) + "}" if labels else ""
+                lines.append(f"{self.name}_sum{suffix} {counts[-1]}")
+                lines.append(f"{self.name}_count{suffix} {counts[-2]}")
+        return lines
+
+
+_registry: dict[str, Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _metric(name: str, help: str, kind: str, **kwargs) -> Metric:
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Histogram(name, help, **kwargs) if kind == "histogram" else Metric(name, help, kind)
+        return _registry[name]
+
+
+def counter(name: str, help: str) -> Metric:
+    return _metric(name, help, "counter")
+
+
+def gauge(name: str, help: str) -> Metric:
+    return _metric(name, help, "gauge")
+
+
+def histogram(name: str, help: str, buckets: tuple[float, ...]) -> Histogram:
+    return _metric(name, help, "histogram", buckets=buckets)
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+async def _metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(text=render(), content_type="text/plain")
+
+
+async def start_metrics_server(port: int, host: str = "0.0.0.0") -> web.AppRunner:
+    # Bot jarayonining o'z /metrics endpointi (oauth_server alohida jarayonda ishlaydi)
+    app = web.Application()
+    app.router.add_get("/metrics", _metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, DateTime, ForeignKey, Boolean
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db import Base
@@ -12,6 +12,7 @@ class User(Base):
     google_refresh_token = Column(Text)
     google_token_json = Column(Text)
     yt_channel_id = Column(String(128))
+    last_active_at = Column(DateTime, index=True)
     created_at = Column(DateTime, default=datetime.now(), nullable=False)
     updated_at = Column(DateTime, default=datetime.now(), onupdate=datetime.now()) 
 
@@ -19,6 +20,9 @@ class User(Base):
     videos = relationship("VideoJob", back_populates="user")
     logo_jobs = relationship("LogoJob", back_populates="user")
     banner_jobs = relationship("BannerJob", back_populates="user")
+    stats_snapshot = relationship("ChannelStatsSnapshot", back_populates="user", uselist=False)
+    channel_videos = relationship("ChannelVideo", back_populates="user")
+    daily_metrics = relationship("ChannelDailyMetric", back_populates="user")
 
 class VideoJob(Base):
     __tablename__ = "video_jobs"
@@ -32,8 +36,20 @@ class VideoJob(Base):
     thumbnail_path = Column(Text)
     yt_video_id = Column(String(64))
     status = Column(String(32), default="draft") 
+    # Resumable yuklash sessiyasi: qayta ishga tushganda shu joydan davom etiladi
+    upload_uri = Column(Text)
+    upload_offset = Column(BigInteger, default=0)
+    # Navbatdagi job: video Telegram'dan tg_file_id orqali olinadi, progress shu xabarda
+    tg_file_id = Column(String(255))
+    chat_id = Column(BigInteger)
+    progress_message_id = Column(BigInteger)
+    # Qayta yuborilgan videoni aniqlash: Telegram fayl ID'si va kontent xeshi
+    tg_file_unique_id = Column(String(64), index=True)
+    content_hash = Column(String(64), index=True)
+    # Bosqichlar vaqti (JSON): download, seo, thumbnail, upload, set_thumbnail...
+    timings = Column(Text)
 
-    created_at = Column(DateTime, default=datetime.now())
+    created_at = Column(DateTime, default=datetime.now)
     user = relationship("User", back_populates="videos")
 
 class LogoJob(Base):
@@ -64,4 +80,65 @@ class BannerJob(Base):
     status = Column(String) 
     created_at = Column(DateTime)
     
-    user = relationship("User", back_populates="banner_jobs")
\ No newline at end of file
+    user = relationship("User", back_populates="banner_jobs")
+
+class ChannelStatsSnapshot(Base):
+    __tablename__ = "channel_stats_snapshots"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    # Qaysi Google akkaunt (token) uchun olingan: boshqa akkaunt ulansa snapshot ishlatilmaydi
+    account_key = Column(String(64))
+    payload = Column(Text, nullable=False)
+    fetched_at = Column(DateTime, nullable=False)
+
+    user = relationship("User", back_populates="stats_snapshot")
+
+class ChannelVideo(Base):
+    __tablename__ = "channel_videos"
+
+    video_id = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    channel_id = Column(String(128), index=True, nullable=False)
+    title = Column(String(255))
+    published_at = Column(DateTime)
+    view_count = Column(BigInteger, default=0, nullable=False)
+    like_count = Column(BigInteger, default=0, nullable=False)
+    comment_count = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime)
+
+    user = relationship("User", back_populates="channel_videos")
+
+class ChannelDailyMetric(Base):
+    __tablename__ = "channel_daily_metrics"
+
+    channel_id = Column(String(128), primary_key=True)
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    views = Column(BigInteger, default=0, nullable=False)
+    minutes_watched = Column(BigInteger, default=0, nullable=False)
+    subscribers_gained = Column(Integer, default=0, nullable=False)
+    subscribers_lost = Column(Integer, default=0, nullable=False)
+    likes = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime)
+
+    user = relationship("User", back_populates="daily_metrics")
+
+class QuotaUsage(Base):
+    __tablename__ = "quota_usage"
+
+    day = Column(Date, primary_key=True)
+    api = Column(String(32), primary_key=True)
+    # 0 - foydalanuvchiga bog'lanmagan chaqiruvlar
+    user_id = Column(Integer, primary_key=True, default=0)
+    units = Column(Integer, default=0, nullable=False)
+
+class SeoCacheEntry(Base):
+    __tablename__ = "seo_cache"
+
+    # sha256(normallashtirilgan mavzu, til, prompt versiyasi)
+    key = Column(String(64), primary_key=True)
+    topic = Column(Text, nullable=False)
+    lang = Column(String(16), nullable=False)
+    prompt_version = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
@@ -0,0 +1,76 @@
+import asyncio
+import datetime
+import logging
+import random
+
+from app.config import (
+    PREWARM_INTERVAL, PREWARM_ACTIVE_DAYS, PREWARM_QUOTA_BUDGET, PREWARM_MIN_QUOTA_SHARE, YT_DAILY_QUOTA,
+)
+from app.models import User
+from app.quota import quota
+from app.statistics import stats_cache
+from app.utils import session_scope
+
+logger = logging.getLogger(__name__)
+
+
+def load_active_users() -> list[tuple[int, str]]:
+    since = datetime.datetime.now() - datetime.timedelta(days=PREWARM_ACTIVE_DAYS)
+    with session_scope() as db:
+        rows = db.query(User.id, User.google_token_json).filter(
+            User.google_connected.is_(True),
+            User.google_token_json.isnot(None),
+            User.last_active_at >= since
+        ).all()
+        return [(r.id, r.google_token_json) for r in rows]
+
+
+async def needs_refresh(user_id: int, token_json: str) -> bool:
+    # TTL ning yarmidan oshgan snapshot ham yangilanadi, foydalanuvchi eskirganini ko'rmasligi uchun
+    entry = await stats_cache.peek(user_id, token_json)
+    if entry is None:
+        return True
+    return datetime.datetime.now() - entry[1] > stats_cache.ttl / 2
+
+
+async def prewarm_cycle():
+    users = await asyncio.to_thread(load_active_users)
+    random.shuffle(users)
+    budget = PREWARM_QUOTA_BUDGET
+    cost = quota.cost("stats.refresh")
+    refreshed = 0
+
+    # Ishni butun sikl davomida jitter bilan tarqatamiz, Google'ga bir vaqtda yopirilmaslik uchun
+    pause = PREWARM_INTERVAL / max(len(users), 1)
+    for user_id, token_json in users:
+        if budget < cost:
+            logger.info("Prewarm: kvota byudjeti tugadi, qolganlari keyingi siklda")
+            break
+        # Kunlik kvotaning qolgan qismi foydalanuvchilarning o'z so'rovlariga qoldiriladi
+        if quota.remaining() < YT_DAILY_QUOTA * PREWARM_MIN_QUOTA_SHARE:
+            logger.info("Prewarm: kunlik kvota kam qoldi, to'xtatildi")
+            break
+        if not quota.allows("stats.refresh", user_id):
+            continue
+        if not await needs_refresh(user_id, token_json):
+            continue
+        await asyncio.sleep(random.uniform(0, pause))
+        try:
+            await stats_cache.refresh(user_id, token_json)
+            refreshed += 1
+        except Exception as e:
+            logger.error(f"Prewarm xatosi (user {user_id}): {e}")
+        budget -= cost
+
+    logger.info(f"Prewarm: {refreshed}/{len(users)} ta kanal yangilandi")
+
+
+async def prewarm_loop():
+    while True:
+        started = asyncio.get_running_loop().time()
+        try:
+            await prewarm_cycle()
+        except Exception as e:
+            logger.error(f"Prewarm sikli xatosi: {e}")
+        elapsed = asyncio.get_running_loop().time() - started
+        await asyncio.sleep(max(PREWARM_INTERVAL - elapsed, 0) + random.uniform(0, PREWARM_INTERVAL * 0.1))
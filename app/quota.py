@@ -0,0 +1,146 @@
+import datetime
+import logging
+import threading
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import YT_DAILY_QUOTA, YTA_DAILY_QUOTA, YT_USER_QUOTA_SHARE
+from app.models import QuotaUsage
+from app.utils import session_scope
+
+logger = logging.getLogger(__name__)
+
+# Har bir chaqiruv turi: (API, birlik narxi).
+# https://developers.google.com/youtube/v3/determine_quota_cost
+COSTS = {
+    "channels.list": ("youtube", 1),
+    "playlistItems.list": ("youtube", 1),
+    "videos.list": ("youtube", 1),
+    "search.list": ("youtube", 100),
+    "videos.insert": ("youtube", 1600),
+    "thumbnails.set": ("youtube", 50),
+    "analytics.query": ("youtubeAnalytics", 1),
+    # Bitta statistika yangilanishining taxminiy narxi (kanal, playlist boshi, videolar batch'i)
+    "stats.refresh": ("youtube", 5),
+}
+
+LIMITS = {
+    "youtube": YT_DAILY_QUOTA,
+    "youtubeAnalytics": YTA_DAILY_QUOTA,
+}
+
+# YouTube kvotasi Tinch okeani vaqti bilan yarim tunda yangilanadi
+try:
+    _QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except ZoneInfoNotFoundError:
+    _QUOTA_TZ = datetime.timezone(datetime.timedelta(hours=-8))
+
+
+class QuotaExceeded(RuntimeError):
+    pass
+
+
+class QuotaLedger:
+    """Daily YouTube quota usage, globally and per user.
+
+    Counters live in memory; the lock only guards them, so checks on the
+    event loop never wait for the database. Every charge is added to
+    quota_usage with an atomic UPDATE outside the lock, and load() reads
+    today's totals back after a restart.
+    """
+
+    def __init__(self, limits: dict[str, int], user_share: float):
+        self.limits = limits
+        self.user_share = user_share
+        self._lock = threading.Lock()
+        self._day = None
+        self._usage: dict[tuple[str, int], int] = {}
+
+    def _today(self) -> datetime.date:
+        return datetime.datetime.now(_QUOTA_TZ).date()
+
+    def _roll_day(self):
+        # Yangi kun noldan boshlanadi: bu kunning hamma sarfi shu jarayon xotirasida
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._usage = {}
+
+    def load(self):
+        """Blocking: merges today's persisted usage into memory (run once at startup, off the loop)."""
+        today = self._today()
+        try:
+            with session_scope() as db:
+                rows = [(row.api, row.user_id, row.units) for row in db.query(QuotaUsage).filter(QuotaUsage.day == today)]
+        except Exception as e:
+            logger.error(f"Kvota jurnalini yuklab bo'lmadi: {e}")
+            return
+        with self._lock:
+            self._roll_day()
+            if self._day != today:
+                return
+            for api, user_id, units in rows:
+                # Bu jarayonning sarfi bazaga ham yozilgan - ikki marta qo'shilmasin
+                key = (api, user_id)
+                self._usage[key] = max(self._usage.get(key, 0), units)
+
+    def _used(self, api: str, user_id: int | None = None) -> int:
+        if user_id is None:
+            return sum(units for (a, _), units in self._usage.items() if a == api)
+        return self._usage.get((api, user_id), 0)
+
+    def remaining(self, api: str = "youtube", user_id: int | None = None) -> int:
+        with self._lock:
+            self._roll_day()
+            left = self.limits[api] - self._used(api)
+            if user_id is not None:
+                user_limit = int(self.limits[api] * self.user_share)
+                left = min(left, user_limit - self._used(api, user_id))
+            return max(left, 0)
+
+    def cost(self, op: str, count: int = 1) -> int:
+        return COSTS[op][1] * count
+
+    def allows(self, op: str, user_id: int | None = None, count: int = 1) -> bool:
+        api = COSTS[op][0]
+        return self.remaining(api, user_id) >= self.cost(op, count)
+
+    def check(self, op: str, user_id: int | None = None, count: int = 1):
+        if not self.allows(op, user_id, count):
+            raise QuotaExceeded(f"YouTube kunlik kvotasi yetarli emas ({op})")
+
+    def charge(self, op: str, user_id: int | None = None, count: int = 1):
+        api, _ = COSTS[op]
+        units = self.cost(op, count)
+        key = (api, user_id or 0)
+        with self._lock:
+            self._roll_day()
+            self._usage[key] = self._usage.get(key, 0) + units
+            day = self._day
+        self._persist(day, api, key[1], units)
+
+    def _persist(self, day: datetime.date, api: str, user_id: int, units: int):
+        # Ikkinchi urinish: qatorni boshqa thread shu orada yaratib qo'ygan bo'lsa
+        error = None
+        for _ in range(2):
+            try:
+                with session_scope() as db:
+                    updated = db.execute(
+                        update(QuotaUsage)
+                        .where(QuotaUsage.day == day, QuotaUsage.api == api, QuotaUsage.user_id == user_id)
+                        .values(units=QuotaUsage.units + units)
+                    ).rowcount
+                    if not updated:
+                        db.add(QuotaUsage(day=day, api=api, user_id=user_id, units=units))
+                return
+            except IntegrityError as e:
+                error = e
+            except Exception as e:
+                error = e
+                break
+        logger.error(f"Kvota jurnaliga yozib bo'lmadi: {error}")
+
+
+quota = QuotaLedger(LIMITS, YT_USER_QUOTA_SHARE)
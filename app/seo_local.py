@@ -0,0 +1,113 @@
+"""Offline SEO: title, description and tags built from the topic alone.
+
+Used when the OpenAI answer is late or unusable. Pure string work, so it
+is instant and always gives the same result for the same topic.
+"""
+import re
+
+# YouTube cheklovlari
+TITLE_MAX = 100
+DESCRIPTION_MAX = 1500
+TAGS_MAX = 15
+TAGS_TOTAL_MAX = 500
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "of", "on",
+    "or", "the", "this", "to", "what", "why", "with", "your", "you", "my", "vs",
+    "va", "bilan", "uchun", "haqida", "qanday", "nima", "nega", "bu", "u", "ham", "yoki", "eng", "qilib",
+    "и", "в", "во", "на", "с", "со", "для", "как", "что", "это", "по", "о", "об", "или", "из", "к", "у",
+    "а", "за", "не", "от", "до", "при", "про",
+}
+
+TEMPLATES = {
+    "en": {
+        "intro": "In this video: {topic}.",
+        "points": "What you will learn: {keywords}.",
+        "outro": "Like the video, subscribe to the channel and share your questions in the comments!",
+        "suffixes": ("tutorial", "guide"),
+    },
+    "uz": {
+        "intro": "Ushbu videoda: {topic}.",
+        "points": "Videoda: {keywords}.",
+        "outro": "Videoga layk bosing, kanalga obuna bo'ling va savollaringizni izohlarda yozing!",
+        "suffixes": ("darslik", "qo'llanma"),
+    },
+    "ru": {
+        "intro": "В этом видео: {topic}.",
+        "points": "Вы узнаете: {keywords}.",
+        "outro": "Ставьте лайк, подписывайтесь на канал и пишите вопросы в комментариях!",
+        "suffixes": ("урок", "гайд"),
+    },
+}
+
+_WORD = re.compile(r"[^\W_]+(?:['ʼ’+#.-][^\W_]+)*\+*#?")
+
+
+def _clean(topic: str) -> str:
+    return re.sub(r"\s+", " ", topic).strip()
+
+
+def _cut(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0]
+    return cut if cut else text[:limit]
+
+
+def keywords(topic: str) -> list[str]:
+    """Topic words without stopwords and one-letter words, lowercased, first occurrence order."""
+    seen = []
+    for word in _WORD.findall(topic.lower()):
+        if len(word) > 1 and word not in STOPWORDS and word not in seen:
+            seen.append(word)
+    return seen
+
+
+def _phrases(topic: str) -> list[str]:
+    # Stopword bilan ajralmagan qo'shni so'z juftliklari: "python fastapi", "fastapi darsi"
+    words = _WORD.findall(topic.lower())
+    return [
+        f"{a} {b}" for a, b in zip(words, words[1:])
+        if len(a) > 1 and len(b) > 1 and a not in STOPWORDS and b not in STOPWORDS
+    ]
+
+
+def make_tags(topic: str, lang: str = "en") -> list[str]:
+    words = keywords(topic)
+    suffixes = TEMPLATES.get(lang, TEMPLATES["en"])["suffixes"]
+    candidates = [" ".join(_WORD.findall(topic.lower()))]
+    candidates += _phrases(topic) + words
+    candidates += [f"{word} {suffix}" for word in words[:2] for suffix in suffixes]
+
+    tags, total = [], 0
+    for tag in candidates:
+        if not tag or tag in tags or len(tag) > TITLE_MAX:
+            continue
+        if len(tags) >= TAGS_MAX or total + len(tag) > TAGS_TOTAL_MAX:
+            break
+        tags.append(tag)
+        total += len(tag)
+    return tags
+
+
+def local_seo(topic: str, lang: str = "en") -> dict:
+    """Title, description and tags in the same shape as gen_seo returns."""
+    template = TEMPLATES.get(lang, TEMPLATES["en"])
+    topic = _clean(topic)
+    title = _cut(topic[:1].upper() + topic[1:], TITLE_MAX)
+    words = keywords(topic)
+    tags = make_tags(topic, lang)
+
+    lines = [template["intro"].format(topic=topic)]
+    if len(words) > 1:
+        lines.append(template["points"].format(keywords=", ".join(words[:6])))
+    lines.append(template["outro"])
+    hashtags = " ".join("#" + re.sub(r"\W", "", word) for word in words[:3] if re.sub(r"\W", "", word))
+    if hashtags:
+        lines.append(hashtags)
+
+    return {
+        "title": title,
+        "description": _cut("\n\n".join(lines), DESCRIPTION_MAX),
+        "tags": tags
+    }
@@ -0,0 +1,77 @@
+"""Merges concurrent identical calls onto one upstream request."""
+import asyncio
+
+from app.metrics import counter
+
+singleflight_requests = counter("singleflight_requests_total", "Single-flight calls by name and role (leader/shared)")
+singleflight_saved = counter("singleflight_saved_calls_total", "Upstream calls avoided by joining an in-flight request")
+
+
+class _Flight:
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.cond = asyncio.Condition()
+        self.task: asyncio.Task | None = None
+
+
+class SingleFlight:
+    """One upstream call per key at a time; everyone asking meanwhile shares its result.
+
+    The call runs in its own task, so a caller that goes away does not
+    cancel it for the others. Once it finishes the key is free again -
+    results are not kept, caching is up to the caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: dict = {}
+
+    async def _run(self, key, flight: _Flight, source):
+        try:
+            async for item in source:
+                flight.items.append(item)
+                async with flight.cond:
+                    flight.cond.notify_all()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._flights.pop(key, None)
+            async with flight.cond:
+                flight.cond.notify_all()
+
+    async def stream(self, key, factory):
+        """Yields every item of factory() (an async generator), started once per key."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.create_task(self._run(key, flight, factory()))
+            singleflight_requests.inc(name=self.name, role="leader")
+        else:
+            singleflight_requests.inc(name=self.name, role="shared")
+            singleflight_saved.inc(name=self.name)
+
+        i = 0
+        while True:
+            async with flight.cond:
+                await flight.cond.wait_for(lambda: len(flight.items) > i or flight.done)
+            # Kechikib qo'shilgan ham oldingi qismlarni tartib bilan oladi
+            while i < len(flight.items):
+                yield flight.items[i]
+                i += 1
+            if flight.done and i == len(flight.items):
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+    async def do(self, key, fn, *args):
+        """Awaits fn(*args) once per key and returns its result to every caller."""
+        async def once():
+            yield await fn(*args)
+
+        result = None
+        async for result in self.stream(key, once):
+            pass
+        return result
@@ -0,0 +1,463 @@
+import asyncio
+import datetime
+import json
+import logging
+from collections import OrderedDict
+from hashlib import sha256
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import case, func
+
+from app.config import (
+    STATS_WORKERS, STATS_CACHE_TTL, STATS_CACHE_SIZE, STATS_CACHE_PERSIST,
+    STATS_RECENT_DAYS, STATS_VIDEO_REFRESH_HOURS, STATS_VIDEO_REFRESH_BATCH,
+    STATS_SETTLE_DAYS, STATS_WINDOWS,
+)
+from app.models import ChannelStatsSnapshot, ChannelVideo, ChannelDailyMetric, User
+from app.utils import session_scope
+from app.quota import quota
+from app.youtube import get_service, execute, execute_batch
+
+logger = logging.getLogger(__name__)
+
+# Google client kutubxonasi sinxron ishlaydi, shuning uchun barcha
+# so'rovlar alohida thread pool'da bajariladi va event loop bloklanmaydi.
+_executor = ThreadPoolExecutor(max_workers=STATS_WORKERS, thread_name_prefix="stats")
+
+
+def _parse_time(value: str | None) -> datetime.datetime | None:
+    if not value:
+        return None
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def _walk_uploads(yt, user_id: int, playlist_id: str, known: set[str]) -> dict[str, datetime.datetime | None]:
+    """Walks the uploads playlist (newest first) until a known video shows up."""
+    new_videos = {}
+    next_page = None
+    while True:
+        resp = execute(yt.playlistItems().list(
+            part="contentDetails",
+            playlistId=playlist_id,
+            maxResults=50,
+            pageToken=next_page
+        ), "playlistItems.list", user_id)
+
+        reached_known = False
+        for item in resp.get("items", []):
+            video_id = item["contentDetails"]["videoId"]
+            if video_id in known:
+                reached_known = True
+                break
+            new_videos[video_id] = _parse_time(item["contentDetails"].get("videoPublishedAt"))
+
+        next_page = resp.get("nextPageToken")
+        if reached_known or not next_page:
+            return new_videos
+
+
+def sync_channel_videos(yt, user_id: int, channel: dict):
+    """Brings channel_videos up to date for one channel.
+
+    The first run walks the whole uploads playlist (1 unit per 50 videos);
+    later runs only read the playlist head for new uploads and refresh
+    counters of recent videos plus a bounded slice of the stalest ones.
+    """
+    channel_id = channel["id"]
+    now = datetime.datetime.utcnow()
+    recent_since = now - datetime.timedelta(days=STATS_RECENT_DAYS)
+    stale_before = now - datetime.timedelta(hours=STATS_VIDEO_REFRESH_HOURS)
+
+    with session_scope() as db:
+        rows = db.query(ChannelVideo.video_id, ChannelVideo.published_at, ChannelVideo.updated_at) \
+            .filter(ChannelVideo.channel_id == channel_id).all()
+    known = {r.video_id for r in rows}
+
+    uploads_playlist = channel["contentDetails"]["relatedPlaylists"]["uploads"]
+    new_videos = _walk_uploads(yt, user_id, uploads_playlist, known)
+
+    recent = [r.video_id for r in rows if r.published_at and r.published_at >= recent_since]
+    stale = sorted(
+        (r for r in rows if r.video_id not in recent and (r.updated_at is None or r.updated_at < stale_before)),
+        key=lambda r: r.updated_at or datetime.datetime.min
+    )[:STATS_VIDEO_REFRESH_BATCH]
+    to_refresh = list(new_videos) + recent + [r.video_id for r in stale]
+
+    # Har bir videos().list 50 tagacha id oladi; bir nechta sahifa bitta batch HTTP so'rov bo'lib ketadi
+    requests = [
+        yt.videos().list(part="snippet,statistics", id=",".join(to_refresh[i:i + 50]))
+        for i in range(0, len(to_refresh), 50)
+    ]
+    fetched = {}
+    for resp in execute_batch(yt, requests, "videos.list", user_id):
+        for item in resp.get("items", []):
+            fetched[item["id"]] = item
+
+    with session_scope() as db:
+        existing = {
+            v.video_id: v for v in
+            db.query(ChannelVideo).filter(ChannelVideo.video_id.in_(to_refresh)).all()
+        } if to_refresh else {}
+        for video_id in to_refresh:
+            item = fetched.get(video_id)
+            video = existing.get(video_id)
+            if item is None:
+                # O'chirilgan yoki yashirilgan video
+                if video is not None:
+                    db.delete(video)
+                continue
+            if video is None:
+                video = ChannelVideo(video_id=video_id, user_id=user_id, channel_id=channel_id)
+                db.add(video)
+            stats = item.get("statistics", {})
+            video.title = item["snippet"]["title"][:255]
+            video.published_at = _parse_time(item["snippet"].get("publishedAt"))
+            video.view_count = int(stats.get("viewCount", 0))
+            video.like_count = int(stats.get("likeCount", 0))
+            video.comment_count = int(stats.get("commentCount", 0))
+            video.updated_at = now
+
+
+def get_video_totals(channel_id: str) -> dict:
+    with session_scope() as db:
+        likes, comments = db.query(
+            func.coalesce(func.sum(ChannelVideo.like_count), 0),
+            func.coalesce(func.sum(ChannelVideo.comment_count), 0)
+        ).filter(ChannelVideo.channel_id == channel_id).one()
+    return {"likes": int(likes), "comments": int(comments)}
+
+
+def get_recent_videos(channel_id: str, limit: int) -> list[dict]:
+    with session_scope() as db:
+        videos = db.query(ChannelVideo).filter(ChannelVideo.channel_id == channel_id) \
+            .order_by(ChannelVideo.published_at.desc().nullslast()).limit(limit).all()
+        return [
+            {"title": v.title, "views": v.view_count, "likes": v.like_count, "comments": v.comment_count}
+            for v in videos
+        ]
+
+
+def fetch_channel(yt, user_id: int) -> dict | None:
+    channel_resp = execute(yt.channels().list(
+        part="snippet,statistics,contentDetails",
+        mine=True
+    ), "channels.list", user_id)
+    if not channel_resp.get("items"):
+        return None
+    return channel_resp["items"][0]
+
+
+def sync_daily_metrics(ya, user_id: int, channel_id: str):
+    """Stores YouTube Analytics day rows in channel_daily_metrics.
+
+    Only days that are not stored yet, plus the last STATS_SETTLE_DAYS days
+    whose numbers are still being finalized, are requested from the API.
+    """
+    today = datetime.date.today()
+    history_start = today - datetime.timedelta(days=max(STATS_WINDOWS) - 1)
+    settled_until = today - datetime.timedelta(days=STATS_SETTLE_DAYS)
+
+    with session_scope() as db:
+        stored = {
+            day for (day,) in db.query(ChannelDailyMetric.day).filter(
+                ChannelDailyMetric.channel_id == channel_id,
+                ChannelDailyMetric.day >= history_start,
+                ChannelDailyMetric.day <= settled_until
+            )
+        }
+
+    query_start = settled_until + datetime.timedelta(days=1)
+    day = history_start
+    while day <= settled_until:
+        if day not in stored:
+            query_start = day
+            break
+        day += datetime.timedelta(days=1)
+
+    analytics_resp = execute(ya.reports().query(
+        ids="channel==MINE",
+        startDate=query_start.isoformat(),
+        endDate=today.isoformat(),
+        metrics="views,estimatedMinutesWatched,subscribersGained,subscribersLost,likes",
+        dimensions="day",
+        sort="day"
+    ), "analytics.query", user_id)
+    rows = {datetime.date.fromisoformat(r[0]): r[1:] for r in analytics_resp.get("rows", [])}
+
+    now = datetime.datetime.now()
+    with session_scope() as db:
+        existing = {
+            m.day: m for m in db.query(ChannelDailyMetric).filter(
+                ChannelDailyMetric.channel_id == channel_id,
+                ChannelDailyMetric.day >= query_start
+            )
+        }
+        day = query_start
+        while day <= today:
+            # API faolliyatsiz kunlarni qaytarmaydi - ularni nol bilan saqlaymiz
+            values = rows.get(day, (0, 0, 0, 0, 0))
+            metric = existing.get(day)
+            if metric is None:
+                metric = ChannelDailyMetric(channel_id=channel_id, day=day, user_id=user_id)
+                db.add(metric)
+            metric.views = int(values[0])
+            metric.minutes_watched = int(values[1])
+            metric.subscribers_gained = int(values[2])
+            metric.subscribers_lost = int(values[3])
+            metric.likes = int(values[4])
+            metric.updated_at = now
+            day += datetime.timedelta(days=1)
+
+
+def get_metric_windows(channel_id: str) -> dict[str, dict]:
+    """Sums the stored day rows over every window in STATS_WINDOWS."""
+    today = datetime.date.today()
+    columns = {
+        "views": ChannelDailyMetric.views,
+        "minutes": ChannelDailyMetric.minutes_watched,
+        "gained": ChannelDailyMetric.subscribers_gained,
+        "lost": ChannelDailyMetric.subscribers_lost,
+        "likes": ChannelDailyMetric.likes,
+    }
+    selects = []
+    for days in STATS_WINDOWS:
+        since = today - datetime.timedelta(days=days - 1)
+        for column in columns.values():
+            selects.append(func.coalesce(func.sum(case((ChannelDailyMetric.day >= since, column), else_=0)), 0))
+
+    with session_scope() as db:
+        values = iter(db.query(*selects).filter(ChannelDailyMetric.channel_id == channel_id).one())
+
+    # JSON orqali keshlanganda kalitlar baribir satrga aylanadi
+    return {str(days): {name: int(next(values)) for name in columns} for days in STATS_WINDOWS}
+
+
+def save_channel_id(user_id: int, channel_id: str):
+    with session_scope() as db:
+        db.query(User).filter(
+            User.id == user_id,
+            (User.yt_channel_id != channel_id) | User.yt_channel_id.is_(None)
+        ).update({User.yt_channel_id: channel_id}, synchronize_session=False)
+
+
+def current_channel_id(db, user_id: int) -> str | None:
+    """The channel the user's statistics were last fetched for."""
+    channel_id = db.query(User.yt_channel_id).filter(User.id == user_id).scalar()
+    if channel_id:
+        return channel_id
+    # Kanal id hali saqlanmagan (statistika yangilanmagan) bo'lsa - oxirgi sinxronlangan kanal
+    return db.query(ChannelDailyMetric.channel_id) \
+        .filter(ChannelDailyMetric.user_id == user_id) \
+        .order_by(ChannelDailyMetric.updated_at.desc().nullslast()) \
+        .limit(1).scalar()
+
+
+def get_daily_series(user_id: int, days: int = 28) -> list[list]:
+    """Returns [day, views, minutes, gained, lost] rows of the user's current channel for the chart."""
+    since = datetime.date.today() - datetime.timedelta(days=days - 1)
+    with session_scope() as db:
+        channel_id = current_channel_id(db, user_id)
+        if channel_id is None:
+            return []
+        rows = db.query(
+            ChannelDailyMetric.day, ChannelDailyMetric.views, ChannelDailyMetric.minutes_watched,
+            ChannelDailyMetric.subscribers_gained, ChannelDailyMetric.subscribers_lost
+        ).filter(
+            ChannelDailyMetric.channel_id == channel_id,
+            ChannelDailyMetric.day >= since
+        ).order_by(ChannelDailyMetric.day).all()
+    return [[r.day.strftime("%d.%m"), r.views, r.minutes_watched, r.subscribers_gained, r.subscribers_lost] for r in rows]
+
+
+def _run(fn, *args):
+    return asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+async def _sync_metrics(ya, user_id: int, channel_id: str) -> dict[str, dict]:
+    await _run(sync_daily_metrics, ya, user_id, channel_id)
+    return await _run(get_metric_windows, channel_id)
+
+
+async def _sync_videos(yt, user_id: int, channel: dict) -> tuple[dict, list[dict]]:
+    await _run(sync_channel_videos, yt, user_id, channel)
+    return await asyncio.gather(
+        _run(get_video_totals, channel["id"]),
+        _run(get_recent_videos, channel["id"], 5),
+    )
+
+
+async def get_channel_stats(user_id: int, token_json: str) -> dict | None:
+    """Collects the statistics report for one channel.
+
+    Once channels().list returns, the analytics day-row sync and the video
+    counter sync run in parallel, each followed by its SQL aggregates.
+    """
+    yt = get_service("youtube", "v3", token_json)
+    ya = get_service("youtubeAnalytics", "v2", token_json)
+
+    channel = await _run(fetch_channel, yt, user_id)
+    if channel is None:
+        return None
+    (totals, recent_videos), windows, _ = await asyncio.gather(
+        _sync_videos(yt, user_id, channel),
+        _sync_metrics(ya, user_id, channel["id"]),
+        # Grafik va eksport foydalanuvchining hozirgi kanalini shu orqali biladi
+        _run(save_channel_id, user_id, channel["id"]),
+    )
+
+    return {
+        "title": channel["snippet"]["title"],
+        "subs": channel["statistics"].get("subscriberCount", "0"),
+        "views": channel["statistics"].get("viewCount", "0"),
+        "videos_count": channel["statistics"].get("videoCount", "0"),
+        "total_likes": totals["likes"],
+        "total_comments": totals["comments"],
+        "windows": windows,
+        "recent_videos": recent_videos,
+    }
+
+
+def account_key(token_json: str) -> str:
+    """Identifies the connected Google account: a reconnect gives a new token and a new key."""
+    return sha256(token_json.encode()).hexdigest()
+
+
+def load_snapshot(user_id: int, key: str) -> tuple[dict, datetime.datetime] | None:
+    with session_scope() as db:
+        snap = db.get(ChannelStatsSnapshot, user_id)
+        if not snap or snap.account_key != key:
+            return None
+        return json.loads(snap.payload), snap.fetched_at
+
+
+def save_snapshot(user_id: int, key: str, stats: dict, fetched_at: datetime.datetime):
+    with session_scope() as db:
+        db.merge(ChannelStatsSnapshot(
+            user_id=user_id,
+            account_key=key,
+            payload=json.dumps(stats),
+            fetched_at=fetched_at
+        ))
+
+
+class StatsCache:
+    """Per-account statistics snapshots with LRU eviction and stale-while-revalidate.
+
+    Entries are keyed by user and connected Google account, so after a
+    reconnect the old channel's numbers are never served. A fresh snapshot
+    is served as is, a stale one is served immediately while a single
+    background refresh replaces it. Only a cold miss waits for Google.
+    When the quota ledger cannot afford a refresh, stale data is served as is.
+    """
+
+    def __init__(self, ttl: int, max_size: int, persist: bool):
+        self.ttl = datetime.timedelta(seconds=ttl)
+        self.max_size = max_size
+        self.persist = persist
+        self._items: OrderedDict[tuple[int, str], tuple[dict, datetime.datetime]] = OrderedDict()
+        self._refreshing: dict[tuple[int, str], asyncio.Task] = {}
+
+    def _put(self, key: tuple[int, str], stats: dict, fetched_at: datetime.datetime):
+        self._items[key] = (stats, fetched_at)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    async def peek(self, user_id: int, token_json: str) -> tuple[dict, datetime.datetime] | None:
+        key = (user_id, account_key(token_json))
+        entry = self._items.get(key)
+        if entry:
+            self._items.move_to_end(key)
+            return entry
+        if not self.persist:
+            return None
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(_executor, load_snapshot, *key)
+        if entry:
+            self._put(key, *entry)
+        return entry
+
+    async def _fetch(self, key: tuple[int, str], token_json: str):
+        user_id = key[0]
+        stats = await get_channel_stats(user_id, token_json)
+        if stats is None:
+            return None
+        fetched_at = datetime.datetime.now()
+        self._put(key, stats, fetched_at)
+        if self.persist:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(_executor, save_snapshot, *key, stats, fetched_at)
+        return stats, fetched_at
+
+    def refresh(self, user_id: int, token_json: str) -> asyncio.Task:
+        # Bir akkaunt uchun bir vaqtda faqat bitta yangilash ishlaydi
+        key = (user_id, account_key(token_json))
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, token_json))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda t: self._on_refreshed(key, t))
+        return task
+
+    def _on_refreshed(self, key: tuple[int, str], task: asyncio.Task):
+        self._refreshing.pop(key, None)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Statistikani yangilashda xato (user {key[0]}): {task.exception()}")
+
+    def is_stale(self, fetched_at: datetime.datetime) -> bool:
+        return datetime.datetime.now() - fetched_at > self.ttl
+
+    async def get(self, user_id: int, token_json: str) -> tuple[dict, datetime.datetime] | None:
+        entry = await self.peek(user_id, token_json)
+        if entry is None:
+            quota.check("stats.refresh", user_id)
+            return await self.refresh(user_id, token_json)
+        if self.is_stale(entry[1]) and quota.allows("stats.refresh", user_id):
+            self.refresh(user_id, token_json)
+        return entry
+
+
+stats_cache = StatsCache(STATS_CACHE_TTL, STATS_CACHE_SIZE, STATS_CACHE_PERSIST)
+
+
+def format_stats(stats: dict, fetched_at: datetime.datetime | None = None) -> str:
+    windows = stats["windows"]
+    text = (
+        f"📊 *Kanal statistikasi*\n"
+        f"📌 Nomi: {stats['title']}\n"
+        f"👥 Obunachilar: {stats['subs']}\n"
+        f"👁 Ko'rishlar: {stats['views']}\n"
+        f"🎞 Videolar soni: {stats['videos_count']}\n"
+        f"👍 Umumiy layklar: {stats['total_likes']}\n"
+        f"💬 Umumiy kommentlar: {stats['total_comments']}\n\n"
+    )
+
+    last_28 = windows.get("28")
+    if last_28:
+        text += (
+            f"📈 *So'nggi 28 kun*\n"
+            f"👁 Ko'rishlar: {last_28['views']}\n"
+            f"⏳ Tomosha vaqti: {last_28['minutes']} daqiqa\n"
+            f"📈 Obunachilar qo'shildi: {last_28['gained']}\n"
+            f"📉 Obunachilar ketdi: {last_28['lost']}\n"
+            f"👍 Layklar: {last_28['likes']}\n\n"
+        )
+
+    other_windows = [
+        f"{days} kun: 👁 {w['views']} | ⏳ {w['minutes']} daq | 👥 +{w['gained']}/-{w['lost']}"
+        for days, w in windows.items() if days != "28"
+    ]
+    if other_windows:
+        text += "📅 *Boshqa oraliqlar*\n" + "\n".join(other_windows) + "\n\n"
+
+    video_stats = [
+        f"🎬 {v['title']}\n👁 {v['views']} | 👍 {v['likes']} | 💬 {v['comments']}"
+        for v in stats["recent_videos"]
+    ]
+    if video_stats:
+        text += "🆕 *So'nggi 5 video*:\n" + "\n\n".join(video_stats)
+
+    if fetched_at:
+        text = text.rstrip() + f"\n\n🕒 Ma'lumotlar holati: {fetched_at.strftime('%d.%m.%Y %H:%M')}"
+
+    return text
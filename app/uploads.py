@@ -0,0 +1,628 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from sqlalchemy import or_
+
+from app.config import (
+    DEFERRED_RETRY_INTERVAL, UPLOAD_STREAMING, UPLOAD_CHUNK_SIZE, UPLOAD_BUFFER_SIZE,
+    TELEGRAM_DOWNLOAD_TIMEOUT, UPLOAD_WORKERS, UPLOAD_USER_CONCURRENCY, UPLOAD_PROGRESS_INTERVAL,
+    SEO_TASK_TTL,
+)
+from app.ai import gen_seo, gen_seo_hedged
+from app.media import temp_path, put_file, link_file, blob_digest
+from app.metrics import counter, histogram
+from app.models import User, VideoJob
+from app.quota import quota, QuotaExceeded
+from app.thumbnail import make_simple_thumbnail
+from app.utils import session_scope
+from app.youtube import upload_video, upload_video_stream, set_thumbnail, StreamBuffer
+
+logger = logging.getLogger(__name__)
+
+MENU_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🏠 Asosiy menyu", callback_data="menu_back")]
+])
+
+
+stage_seconds = histogram(
+    "upload_stage_seconds", "Duration of upload pipeline stages",
+    (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+stage_bytes = counter("upload_stage_bytes_total", "Bytes moved by upload pipeline stages")
+stage_errors = counter("upload_stage_errors_total", "Upload pipeline stages that raised")
+upload_retries = counter("upload_retries_total", "Retried upload chunks")
+
+
+class JobTimings:
+    """Per-stage timings of one job: stored on VideoJob.timings and exported as metrics.
+
+    Each stage records seconds and, where it moves data, bytes and MB/s;
+    the upload stages also count retried chunks.
+    """
+
+    def __init__(self, stored: str | None = None):
+        # Oldingi urinishdagi (masalan, qayta ishga tushishdan oldingi) bosqichlar saqlanadi
+        self.stages: dict[str, dict] = json.loads(stored) if stored else {}
+
+    @contextmanager
+    def stage(self, name: str, size: int | None = None):
+        record = {"bytes": size} if size else {}
+        started = time.monotonic()
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = type(e).__name__
+            stage_errors.inc(stage=name)
+            raise
+        finally:
+            self.record(name, time.monotonic() - started, record)
+
+    def record(self, name: str, seconds: float, record: dict | None = None):
+        record = record if record is not None else {}
+        record["seconds"] = round(seconds, 3)
+        if record.get("bytes") and seconds > 0:
+            record["mb_s"] = round(record["bytes"] / seconds / (1024 * 1024), 2)
+        self.stages[name] = record
+        stage_seconds.observe(seconds, stage=name)
+        if record.get("bytes"):
+            stage_bytes.inc(record["bytes"], stage=name)
+
+    def retry_counter(self, record: dict):
+        def on_retry(error: Exception):
+            record["retries"] = record.get("retries", 0) + 1
+            upload_retries.inc()
+        return on_retry
+
+    def to_json(self) -> str:
+        return json.dumps(self.stages)
+
+
+def job_header(job: VideoJob) -> str:
+    if not job.title:
+        return f"🎯 Mavzu: {job.topic}\n"
+    tags = job.tags.split(",") if job.tags else []
+    return (
+        f"🎯 Mavzu: {job.topic}\n"
+        f"🧠 Title: {job.title}\n"
+        f"🏷 Tags: {', '.join(tags)}\n"
+    )
+
+
+# Mavzu kelishi bilan boshlangan SEO so'rovlari: (tg_id, mavzu) -> (vaqt, task)
+_seo_tasks: dict[tuple[int, str], tuple[float, asyncio.Task]] = {}
+
+
+def start_seo(tg_id: int, topic: str):
+    """Starts gen_seo for the topic speculatively, before the video arrives.
+
+    The user still has to send the file, so by the time the worker needs the
+    SEO text the LLM round trip is usually over. Tasks nobody claims within
+    SEO_TASK_TTL seconds are dropped.
+    """
+    now = time.monotonic()
+    for key, (started, _) in list(_seo_tasks.items()):
+        if now - started > SEO_TASK_TTL:
+            del _seo_tasks[key]
+    if (tg_id, topic) not in _seo_tasks:
+        _seo_tasks[(tg_id, topic)] = (now, asyncio.create_task(gen_seo(topic)))
+
+
+async def take_seo(tg_id: int, topic: str) -> dict:
+    # Javob kechiksa yuklash lokal SEO bilan davom etadi, AI javobi keshga tushadi
+    _, task = _seo_tasks.pop((tg_id, topic), (None, None))
+    data, _, _ = await gen_seo_hedged(topic, task=task)
+    return data
+
+
+def build_video_text(topic: str, seo: dict) -> tuple[str, str, list[str]]:
+    title = seo.get("title", topic)[:100]
+    description = seo.get("description", "")
+    tags = seo.get("tags", ["youtube", "video"])
+
+    clean_tags = []
+    for t in tags:
+        cleaned = t.strip().replace(' ', '').replace("'", '').replace('ʼ', '')
+        clean_tags.append(f"#{cleaned}")
+    tags = clean_tags
+
+    title = title + " | " + f"{', '.join(tags[:2])}"
+    description = description + "\n\n" + f"{', '.join(tags[2:])}"
+    return title, description, tags
+
+
+async def prepare_job_text(job: VideoJob, user: User, timings: JobTimings):
+    """Fills in title, description, tags and the thumbnail of a fresh job."""
+    with timings.stage("seo"):
+        seo = await take_seo(int(user.tg_id), job.topic)
+    title, description, tags = build_video_text(job.topic, seo)
+    thumb_tmp = temp_path(".jpg")
+    with timings.stage("thumbnail"):
+        await asyncio.to_thread(make_simple_thumbnail, title, thumb_tmp)
+        job.thumbnail_path = await asyncio.to_thread(put_file, thumb_tmp, ".jpg")
+    job.title, job.description, job.tags = title, description, ",".join(tags)
+    await asyncio.to_thread(
+        update_job, job.id,
+        title=job.title, description=job.description, tags=job.tags, thumbnail_path=job.thumbnail_path
+    )
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+class ProgressMessage:
+    """Keeps the job's Telegram message up to date while a worker uploads it.
+
+    update() is called from the upload thread after every committed chunk and
+    only stores the numbers; run() edits the message at most once per
+    UPLOAD_PROGRESS_INTERVAL seconds, so Telegram's edit limits are respected.
+    """
+
+    def __init__(self, bot: Bot, chat_id: int, message_id: int | None, header: str):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.header = header
+        self.stage = "⏳ Navbatda"
+        self.sent = 0
+        self.total = None
+        self._shown = None
+        # Flood control: shu vaqtgacha oraliq yangilanishlar yuborilmaydi
+        self._blocked_until = 0.0
+
+    def update(self, sent: int, total: int | None = None):
+        self.sent = sent
+        if total:
+            self.total = total
+
+    def text(self) -> str:
+        if not self.sent:
+            return self.header + self.stage
+        if self.total:
+            percent = min(100, self.sent * 100 // self.total)
+            return self.header + f"{self.stage}: {percent}% ({_mb(self.sent)} / {_mb(self.total)})"
+        return self.header + f"{self.stage}: {_mb(self.sent)}"
+
+    async def set_stage(self, stage: str, total: int | None = None):
+        self.stage = stage
+        self.sent = 0
+        self.total = total
+        await self.edit(self.text())
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(UPLOAD_PROGRESS_INTERVAL)
+            await self.edit(self.text())
+
+    async def edit(self, text: str, reply_markup=None, final: bool = False):
+        """Shows text in the job message; Telegram errors are logged, never raised.
+
+        While Telegram's flood control is in effect progress edits are
+        skipped; a final edit (the job result) waits it out instead.
+        """
+        if text == self._shown:
+            return
+        wait = self._blocked_until - time.monotonic()
+        if wait > 0:
+            if not final:
+                return
+            await asyncio.sleep(wait)
+        try:
+            if self.message_id is None:
+                msg = await self.bot.send_message(self.chat_id, text, reply_markup=reply_markup)
+                self.message_id = msg.message_id
+            else:
+                await self.bot.edit_message_text(
+                    text, chat_id=self.chat_id, message_id=self.message_id, reply_markup=reply_markup
+                )
+            self._shown = text
+        except TelegramRetryAfter as e:
+            logger.warning(f"Progress xabari {e.retry_after} s kutadi ({self.chat_id})")
+            self._blocked_until = time.monotonic() + e.retry_after
+            if final:
+                await self.edit(text, reply_markup, final)
+        except TelegramAPIError as e:
+            # Xabar o'chirilgan, tarmoq yoki Telegram server xatosi - yuklashni to'xtatmaymiz
+            logger.warning(f"Progress xabari yangilanmadi ({self.chat_id}): {e}")
+
+
+def save_progress(job_id: int, upload_uri: str, offset: int):
+    # Alohida sessiya: yuklash davomida har bir bo'lakdan keyin darhol commit qilinadi
+    with session_scope() as db:
+        job = db.get(VideoJob, job_id)
+        job.upload_uri = upload_uri
+        job.upload_offset = offset
+
+
+def update_job(job_id: int, **fields):
+    with session_scope() as db:
+        job = db.get(VideoJob, job_id)
+        for name, value in fields.items():
+            setattr(job, name, value)
+
+
+# Shu holatlardagi job bilan bir xil video qayta yuklanmaydi
+DUPLICATE_STATUSES = ("queued", "uploading", "deferred", "uploaded")
+
+
+def find_duplicate(db, user_id: int, job_id: int | None = None,
+                   file_unique_id: str | None = None, content_hash: str | None = None) -> VideoJob | None:
+    """Another job of the user with the same Telegram file or the same content.
+
+    An uploaded job is preferred over one that is still in flight.
+    """
+    match = []
+    if file_unique_id:
+        match.append(VideoJob.tg_file_unique_id == file_unique_id)
+    if content_hash:
+        match.append(VideoJob.content_hash == content_hash)
+    if not match:
+        return None
+    jobs = (
+        db.query(VideoJob)
+        .filter(VideoJob.user_id == user_id, VideoJob.id != job_id, VideoJob.status.in_(DUPLICATE_STATUSES))
+        .filter(or_(*match))
+        .order_by(VideoJob.created_at)
+        .all()
+    )
+    uploaded = [job for job in jobs if job.status == "uploaded"]
+    return (uploaded or jobs or [None])[0]
+
+
+def duplicate_message(job: VideoJob) -> str:
+    if job.status == "uploaded":
+        return f"♻️ Bu video allaqachon yuklangan: https://youtu.be/{job.yt_video_id}"
+    return "♻️ Bu video allaqachon navbatda yoki yuklanmoqda, qayta yuklanmaydi."
+
+
+def _mark_if_duplicate(job_id: int, content_hash: str) -> str | None:
+    with session_scope() as db:
+        job = db.get(VideoJob, job_id)
+        duplicate = find_duplicate(db, job.user_id, job.id, content_hash=content_hash)
+        if duplicate is None:
+            return None
+        job.status = "duplicate"
+        job.yt_video_id = duplicate.yt_video_id
+        return duplicate_message(duplicate)
+
+
+def _start_job(job_id: int) -> tuple[VideoJob, User] | None:
+    """Marks the job as uploading and returns detached copies for the worker.
+
+    The worker must not keep a session open for the whole upload, so the job
+    and its user are loaded here and expunged; every later change goes
+    through a short session of its own.
+    """
+    with session_scope() as db:
+        job = db.get(VideoJob, job_id)
+        if job is None or job.status not in ("queued", "uploading"):
+            return None
+        user = job.user
+        job.status = "uploading"
+        db.flush()
+        db.expunge(job)
+        db.expunge(user)
+        return job, user
+
+
+def publish_job(job: VideoJob, user: User, progress: ProgressMessage | None = None,
+                timings: JobTimings | None = None) -> str:
+    """Blocking: uploads job.file_path and returns the YouTube video id.
+
+    The resumable session URI and committed offset are saved after every
+    chunk, so an interrupted upload continues from job.upload_uri. Raises
+    QuotaExceeded before anything is sent when the daily quota cannot cover
+    the upload; the caller decides to defer the job.
+    """
+    tags = job.tags.split(",") if job.tags else []
+
+    def on_progress(uri: str, offset: int):
+        save_progress(job.id, uri, offset)
+        if progress:
+            progress.update(offset)
+
+    timings = timings or JobTimings()
+    # Davom ettirilgan yuklashda faqat qolgan baytlar yuboriladi
+    sent_before = (job.upload_offset or 0) if job.upload_uri else 0
+    with timings.stage("upload", os.path.getsize(job.file_path) - sent_before) as record:
+        if sent_before:
+            record["resumed_from"] = sent_before
+        return upload_video(
+            user, job.file_path, job.title, job.description, tags,
+            resume_uri=job.upload_uri, on_progress=on_progress, on_retry=timings.retry_counter(record)
+        )
+
+
+def finish_job(job: VideoJob, user: User, yt_id: str, timings: JobTimings | None = None) -> str:
+    update_job(job.id, yt_video_id=yt_id, status="uploaded")
+    try:
+        with (timings or JobTimings()).stage("set_thumbnail"):
+            set_thumbnail(user, yt_id, job.thumbnail_path)
+    except Exception as e:
+        # Video allaqachon yuklangan - muqova xatosi uchun qayta yuklamaymiz
+        logger.error(f"Muqova o'rnatilmadi (job {job.id}): {e}")
+    return f"✅ Yuklandi! YouTube video ID: {yt_id}"
+
+
+async def telegram_chunks(bot: Bot, file_path: str):
+    url = bot.session.api.file_url(bot.token, file_path)
+    async for chunk in bot.session.stream_content(url, timeout=TELEGRAM_DOWNLOAD_TIMEOUT, chunk_size=1024 * 1024):
+        yield chunk
+
+
+async def stream_to_youtube(bot: Bot, file_path: str, user: User, title: str, description: str, tags: list[str],
+                            on_progress=None, on_retry=None) -> str:
+    """Feeds the Telegram download straight into a resumable YouTube upload.
+
+    Both transfers run at the same time; the buffer between them is bounded,
+    so a slow upload slows the download down instead of filling memory.
+    """
+    buffer = StreamBuffer(max(UPLOAD_BUFFER_SIZE, UPLOAD_CHUNK_SIZE * 2))
+    upload = asyncio.create_task(asyncio.to_thread(
+        upload_video_stream, user, buffer, title, description, tags, on_progress, on_retry
+    ))
+    try:
+        try:
+            async for chunk in telegram_chunks(bot, file_path):
+                await asyncio.to_thread(buffer.write, chunk)
+            buffer.close()
+        except Exception as e:
+            buffer.abort(e)
+            upload_error = (await asyncio.gather(upload, return_exceptions=True))[0]
+            # Yuklash xatosi sababli to'xtagan bo'lsak, asl xatoni ko'rsatamiz
+            if e.__cause__ is not None and e.__cause__ is upload_error:
+                raise upload_error
+            raise
+        return await upload
+    except BaseException as e:
+        # Bekor qilinganda ham (masalan, bot to'xtaganda) buferda kutayotgan
+        # threadlar bo'shatiladi, aks holda executor yopilmay qoladi
+        buffer.abort(e)
+        raise
+
+
+async def download_job_file(bot: Bot, job: VideoJob, timings: JobTimings):
+    with timings.stage("download") as record:
+        # Lokal Bot API serverda getFile faylni o'zi yuklab oladi, uzoq kutish mumkin
+        file_obj = await bot.get_file(job.tg_file_id, request_timeout=TELEGRAM_DOWNLOAD_TIMEOUT)
+        record["bytes"] = file_obj.file_size
+        if bot.session.api.is_local:
+            # Fayl allaqachon diskda: nusxa olmasdan hardlink (yoki yo'lning o'zi)
+            local_path = str(bot.session.api.wrap_local_file.to_local(file_obj.file_path))
+            job.file_path, job.content_hash = await asyncio.to_thread(link_file, local_path, ".mp4")
+        else:
+            # Avval vaqtinchalik faylga, keyin kontent xeshi bo'yicha media omboriga
+            tmp_path = temp_path(".mp4")
+            await bot.download_file(file_obj.file_path, destination=tmp_path, timeout=TELEGRAM_DOWNLOAD_TIMEOUT)
+            job.file_path = await asyncio.to_thread(put_file, tmp_path, ".mp4")
+            job.content_hash = blob_digest(job.file_path)
+    await asyncio.to_thread(update_job, job.id, file_path=job.file_path, content_hash=job.content_hash)
+
+
+async def process_job(bot: Bot, job_id: int, queue_wait: float | None = None):
+    """Uploads one queued job, editing its progress message along the way."""
+    started = await asyncio.to_thread(_start_job, job_id)
+    if started is None:
+        return
+    job, user = started
+    timings = JobTimings(job.timings)
+    if queue_wait is not None:
+        timings.record("queue_wait", queue_wait)
+    progress = ProgressMessage(bot, job.chat_id or int(user.tg_id), job.progress_message_id, job_header(job))
+    ticker = asyncio.create_task(progress.run())
+    download = None
+    try:
+        on_disk = bool(job.file_path) and os.path.exists(job.file_path)
+        if not on_disk and not job.tg_file_id:
+            raise RuntimeError("Video fayli topilmadi. Videoni qaytadan yuboring.")
+        # Lokal Bot API serverda fayl diskda tayyor - oqimga hojat yo'q
+        streaming = (not on_disk and UPLOAD_STREAMING and not bot.session.api.is_local
+                     and quota.allows("videos.insert", user.id))
+
+        # SEO matni va Telegram'dan yuklab olish bir vaqtda: video kelguncha
+        # SEO odatda tayyor bo'ladi, bo'lmasa kutish yuklab olish bilan qoplanadi
+        if not on_disk and not streaming:
+            download = asyncio.create_task(download_job_file(bot, job, timings))
+        if not job.title:
+            await progress.set_stage("🧠 SEO tayyorlanmoqda" if download is None
+                                     else "⬇️ Video yuklab olinmoqda, 🧠 SEO tayyorlanmoqda")
+            await prepare_job_text(job, user, timings)
+            progress.header = job_header(job)
+        tags = job.tags.split(",") if job.tags else []
+
+        if streaming:
+            file_obj = await bot.get_file(job.tg_file_id)
+            await progress.set_stage("⬆️ YouTube'ga yuklanmoqda", file_obj.file_size)
+            # Oqimda yuklab olish va yuklash bitta bosqich
+            with timings.stage("stream", file_obj.file_size) as record:
+                yt_id = await stream_to_youtube(
+                    bot, file_obj.file_path, user, job.title, job.description, tags,
+                    on_progress=lambda uri, offset: progress.update(offset),
+                    on_retry=timings.retry_counter(record)
+                )
+        else:
+            if download is not None:
+                if not download.done():
+                    await progress.set_stage("⬇️ Telegram'dan yuklab olinmoqda")
+                await download
+            # Boshqa fayl sifatida qayta yuborilgan bir xil video
+            duplicate = job.content_hash and await asyncio.to_thread(_mark_if_duplicate, job_id, job.content_hash)
+            if duplicate:
+                await progress.edit(progress.header + duplicate, reply_markup=MENU_KEYBOARD, final=True)
+                return
+            await progress.set_stage("⬆️ YouTube'ga yuklanmoqda", os.path.getsize(job.file_path))
+            yt_id = await asyncio.to_thread(publish_job, job, user, progress, timings)
+        msg = await asyncio.to_thread(finish_job, job, user, yt_id, timings)
+    except QuotaExceeded:
+        await asyncio.to_thread(update_job, job_id, status="deferred")
+        msg = "⏳ YouTube kunlik limiti tugadi. Video saqlandi va limit yangilangach avtomatik yuklanadi."
+    except Exception as e:
+        logger.error(f"Yuklashda xato (job {job_id}): {e}")
+        await asyncio.to_thread(update_job, job_id, status="failed")
+        msg = f"❌ Yuklashda xato: {e}"
+    finally:
+        ticker.cancel()
+        if download is not None and not download.done():
+            download.cancel()
+        await asyncio.to_thread(update_job, job_id, timings=timings.to_json())
+    await progress.edit(progress.header + msg, reply_markup=MENU_KEYBOARD, final=True)
+
+
+class UploadQueue:
+    """Fair scheduler for upload jobs in front of the YouTube uploads.
+
+    At most `workers` jobs run at once and at most `per_user` of them belong
+    to the same user. Waiting jobs are kept per user and users take turns
+    (round robin), so one user sending many videos cannot starve the rest.
+    Handlers only commit a job as "queued" and submit it; downloading and
+    uploading happen in the workers, outside the update handler.
+    """
+
+    def __init__(self, workers: int, per_user: int):
+        self.workers = workers
+        self.per_user = per_user
+        # user_id -> kutayotgan joblar; tartib navbat kimga kelishini bildiradi
+        self._waiting: OrderedDict[int, deque[int]] = OrderedDict()
+        self._running: Counter[int] = Counter()
+        self._pending: set[int] = set()
+        self._reported: dict[int, int] = {}
+        self._submitted: dict[int, float] = {}
+        self._cond: asyncio.Condition | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self, bot: Bot):
+        self._cond = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker(bot)) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._report_positions(bot)))
+
+    async def submit(self, job_id: int, user_id: int):
+        # Bir job ikki marta navbatga tushmasin (masalan, tiklash va kechiktirilgan yuklash)
+        if job_id in self._pending:
+            return
+        self._pending.add(job_id)
+        self._submitted[job_id] = time.monotonic()
+        async with self._cond:
+            self._waiting.setdefault(user_id, deque()).append(job_id)
+            self._cond.notify()
+
+    def position(self, job_id: int) -> int | None:
+        """1-based place of a waiting job in the round-robin order."""
+        queues = list(self._waiting.values())
+        place = 0
+        for turn in range(max((len(q) for q in queues), default=0)):
+            for jobs in queues:
+                if turn < len(jobs):
+                    place += 1
+                    if jobs[turn] == job_id:
+                        return place
+        return None
+
+    def _take(self) -> tuple[int, int] | None:
+        for user_id in self._waiting:
+            if self._running[user_id] >= self.per_user:
+                continue
+            jobs = self._waiting.pop(user_id)
+            job_id = jobs.popleft()
+            if jobs:
+                # Navbat oxiriga: keyingi safar boshqa foydalanuvchilar oldinda
+                self._waiting[user_id] = jobs
+            self._running[user_id] += 1
+            return user_id, job_id
+        return None
+
+    async def _worker(self, bot: Bot):
+        while True:
+            async with self._cond:
+                while (taken := self._take()) is None:
+                    await self._cond.wait()
+            user_id, job_id = taken
+            queue_wait = time.monotonic() - self._submitted.pop(job_id)
+            try:
+                await process_job(bot, job_id, queue_wait)
+            except Exception as e:
+                logger.error(f"Yuklash ishchisida xato (job {job_id}): {e}")
+            finally:
+                self._pending.discard(job_id)
+                self._reported.pop(job_id, None)
+                async with self._cond:
+                    self._running[user_id] -= 1
+                    if not self._running[user_id]:
+                        del self._running[user_id]
+                    self._cond.notify_all()
+
+    async def _report_positions(self, bot: Bot):
+        # Kutayotgan joblar xabarida navbatdagi o'rni ko'rsatiladi (faqat o'zgarganda)
+        while True:
+            await asyncio.sleep(UPLOAD_PROGRESS_INTERVAL)
+            for jobs in list(self._waiting.values()):
+                for job_id in list(jobs):
+                    place = self.position(job_id)
+                    if place is None or self._reported.get(job_id) == place:
+                        continue
+                    self._reported[job_id] = place
+                    try:
+                        job = await asyncio.to_thread(_load_job, job_id)
+                        if job and job.progress_message_id:
+                            message = ProgressMessage(bot, job.chat_id, job.progress_message_id, job_header(job))
+                            await message.edit(message.header + f"⏳ Navbatda: {place}-o'rin")
+                    except Exception as e:
+                        logger.error(f"Navbat o'rni yangilanmadi (job {job_id}): {e}")
+
+
+upload_queue = UploadQueue(UPLOAD_WORKERS, UPLOAD_USER_CONCURRENCY)
+
+
+def _load_job(job_id: int) -> VideoJob | None:
+    with session_scope() as db:
+        job = db.get(VideoJob, job_id)
+        if job is not None:
+            db.expunge(job)
+        return job
+
+
+def _jobs(*statuses: str) -> list[tuple[int, int]]:
+    with session_scope() as db:
+        return [
+            (job_id, user_id) for job_id, user_id in db.query(VideoJob.id, VideoJob.user_id)
+            .filter(VideoJob.status.in_(statuses))
+            .order_by(VideoJob.created_at)
+        ]
+
+
+async def resume_interrupted_uploads():
+    """Startup pass: queues jobs that were waiting or running when the bot stopped.
+
+    Jobs with the video on disk continue their resumable session; the rest
+    are downloaded from Telegram again by tg_file_id.
+    """
+    for job_id, user_id in await asyncio.to_thread(_jobs, "uploading", "queued"):
+        await upload_queue.submit(job_id, user_id)
+
+
+def _requeue_deferred() -> list[tuple[int, int]]:
+    with session_scope() as db:
+        jobs = db.query(VideoJob).filter(VideoJob.status == "deferred").order_by(VideoJob.created_at).all()
+        for job in jobs:
+            job.status = "queued"
+        return [(job.id, job.user_id) for job in jobs]
+
+
+async def retry_deferred_uploads():
+    """Queues jobs deferred for lack of quota once the quota allows it again."""
+    while True:
+        await asyncio.sleep(DEFERRED_RETRY_INTERVAL)
+        if not quota.allows("videos.insert"):
+            continue
+        try:
+            for job_id, user_id in await asyncio.to_thread(_requeue_deferred):
+                await upload_queue.submit(job_id, user_id)
+        except Exception as e:
+            logger.error(f"Kechiktirilgan yuklashlarda xato: {e}")
@@ -1,9 +1,25 @@
 import json
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, MediaUpload, HttpRequest, build_http
 from google.oauth2.credentials import Credentials
+from app.config import GOOGLE_SERVICE_CACHE_SIZE, UPLOAD_CHUNK_SIZE, UPLOAD_MAX_RETRIES
 from app.models import User
-from sqlalchemy.orm import Session
+from app.quota import quota
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {500, 502, 503, 504}
 
 YOUTUBE_SCOPES = [
     "https://www.googleapis.com/auth/youtube.readonly",
@@ -13,24 +29,256 @@ YOUTUBE_SCOPES = [
 ]
 
 
+# Discovery hujjatlari kutubxona ichidagi statik nusxadan bir marta o'qiladi,
+# keyin har bir service shu tayyor dict'dan quriladi (tarmoq so'rovisiz).
+_DISCOVERY_DOCS = {
+    ("youtube", "v3"): json.loads(get_static_doc("youtube", "v3")),
+    ("youtubeAnalytics", "v2"): json.loads(get_static_doc("youtubeAnalytics", "v2")),
+}
+
+# httplib2.Http thread-safe emas: har bir worker thread o'z ulanishini
+# qayta ishlatadi, service obyektlari esa threadlar orasida bo'lishiladi.
+_local = threading.local()
+
+_services: OrderedDict[tuple, object] = OrderedDict()
+_services_lock = threading.Lock()
+
+
+def _pooled_http() -> httplib2.Http:
+    # build_http: 60 s timeout, 308 esa redirect emas (resumable upload javobi)
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = _local.http = build_http()
+    return http
+
+
+def _request_builder(creds: Credentials):
+    def build_request(http, *args, **kwargs):
+        return HttpRequest(AuthorizedHttp(creds, http=_pooled_http()), *args, **kwargs)
+    return build_request
+
+
+def creds_from_token(token_json: str) -> Credentials:
+    return Credentials.from_authorized_user_info(json.loads(token_json), scopes=YOUTUBE_SCOPES)
+
+
 def creds_from_user(user: User):
     if not user.google_token_json:
         return None
-    data = json.loads(user.google_token_json)
-    return Credentials.from_authorized_user_info(data, scopes=YOUTUBE_SCOPES)
+    return creds_from_token(user.google_token_json)
+
+
+def get_service(name: str, version: str, token_json: str):
+    """Returns a cached service object for the given API and credentials."""
+    key = (name, version, sha256(token_json.encode()).hexdigest())
+    with _services_lock:
+        service = _services.get(key)
+        if service is not None:
+            _services.move_to_end(key)
+            return service
+
+    creds = creds_from_token(token_json)
+    service = build_from_document(
+        _DISCOVERY_DOCS[(name, version)],
+        http=AuthorizedHttp(creds, http=_pooled_http()),
+        requestBuilder=_request_builder(creds),
+    )
+    with _services_lock:
+        _services[key] = service
+        while len(_services) > GOOGLE_SERVICE_CACHE_SIZE:
+            _services.popitem(last=False)
+    return service
+
+
+def execute(request, op: str, user_id: int | None = None):
+    """Executes a request after checking and recording its quota cost.
+
+    Google charges the units even when the call fails, so they are recorded
+    before the request is sent.
+    """
+    quota.check(op, user_id)
+    quota.charge(op, user_id)
+    return request.execute()
+
+
+def execute_batch(service, requests: list, op: str, user_id: int | None = None, batch_size: int = 50) -> list:
+    """Sends requests as multipart HTTP batches and returns responses in order.
+
+    A batch saves round trips, not quota: every inner call is charged.
+    """
+    results = [None] * len(requests)
+    quota.check(op, user_id, count=len(requests))
+    quota.charge(op, user_id, count=len(requests))
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            raise exception
+        results[int(request_id)] = response
+
+    for start in range(0, len(requests), batch_size):
+        batch = service.new_batch_http_request(callback=callback)
+        for i, request in enumerate(requests[start:start + batch_size], start):
+            batch.add(request, request_id=str(i))
+        batch.execute()
+    return results
+
 
 def yt_service(user: User):
-    creds = creds_from_user(user)
-    if not creds:
+    if not user.google_token_json:
         return None
-    return build("youtube", "v3", credentials=creds)
+    return get_service("youtube", "v3", user.google_token_json)
 
-def upload_video(db: Session, user: User, file_path: str, title: str, description: str, tags: list[str]):
-    service = yt_service(user)
-    if not service:
-        raise RuntimeError("Google account ulangan emas. /connect bosing.")
 
-    body = {
+def analytics_service(user: User):
+    if not user.google_token_json:
+        return None
+    return get_service("youtubeAnalytics", "v2", user.google_token_json)
+
+class StreamBuffer:
+    """Bounded, thread-safe byte buffer between a download and a resumable upload.
+
+    The producer blocks while max_size bytes are waiting. Bytes below the
+    offset the uploader asks for next are committed on YouTube and dropped,
+    so a chunk that has to be re-sent after an error is still available.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._cond = threading.Condition()
+        self._data = bytearray()
+        self._offset = 0
+        self._closed = False
+        self._error: BaseException | None = None
+
+    def write(self, chunk: bytes):
+        with self._cond:
+            while len(self._data) >= self.max_size and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise RuntimeError("Yuklash to'xtatildi") from self._error
+            self._data += chunk
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def abort(self, error: BaseException):
+        with self._cond:
+            self._error = error
+            self._cond.notify_all()
+
+    def wait_ahead(self, begin: int, length: int) -> int | None:
+        """Blocks until more than `length` bytes follow `begin` or the stream is closed.
+
+        Returns the total size once the stream is closed, None while more
+        data is still coming.
+        """
+        with self._cond:
+            # begin'dan oldingi baytlar YouTube'da saqlangan: ular joy egallab yozuvchini to'smasin
+            self._commit(begin)
+            while self._offset + len(self._data) - begin <= length and not self._closed and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise RuntimeError("Yuklab olish to'xtatildi") from self._error
+            return self._offset + len(self._data) if self._closed else None
+
+    def _commit(self, begin: int):
+        if begin > self._offset:
+            del self._data[:begin - self._offset]
+            self._offset = begin
+            self._cond.notify_all()
+
+    def read(self, begin: int, length: int) -> bytes:
+        with self._cond:
+            self._commit(begin)
+            while len(self._data) < length and not self._closed and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise RuntimeError("Yuklab olish to'xtatildi") from self._error
+            return bytes(self._data[:length])
+
+
+class StreamMediaUpload(MediaUpload):
+    """Resumable media of unknown size fed from a StreamBuffer.
+
+    The total size is only known once the download ends. Before each chunk
+    run_resumable calls prepare(), which holds the chunk back until either
+    more data follows it or the buffer is closed; the last PUT therefore
+    always carries data together with the total, even when the length is
+    an exact multiple of the chunk size.
+    """
+
+    def __init__(self, buffer: StreamBuffer, chunksize: int, mimetype: str = "video/mp4"):
+        self._buffer = buffer
+        self._chunksize = chunksize
+        self._mimetype = mimetype
+        self._size = None
+
+    def chunksize(self):
+        return self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def prepare(self, begin: int):
+        self._size = self._buffer.wait_ahead(begin, self._chunksize)
+
+    def size(self):
+        return self._size
+
+    def resumable(self):
+        return True
+
+    def getbytes(self, begin, length):
+        return self._buffer.read(begin, length)
+
+    def has_stream(self):
+        return False
+
+
+def run_resumable(req, on_progress=None, on_retry=None):
+    """Drives a resumable upload chunk by chunk until YouTube returns the video.
+
+    5xx responses and transport errors are retried with exponential backoff;
+    after an error the next call asks the server which bytes it already has,
+    so nothing committed is sent twice. on_progress(uri, offset) is called
+    after every committed chunk, on_retry(error) before every retry.
+    """
+    retries = 0
+    resp = None
+    prepare = getattr(req.resumable, "prepare", None)
+    while resp is None:
+        try:
+            if prepare:
+                prepare(req.resumable_progress)
+            _, resp = req.next_chunk()
+        except HttpError as e:
+            if e.resp.status not in RETRYABLE_STATUSES or retries >= UPLOAD_MAX_RETRIES:
+                raise
+            error = e
+        except (httplib2.HttpLib2Error, OSError) as e:
+            if retries >= UPLOAD_MAX_RETRIES:
+                raise
+            error = e
+        else:
+            retries = 0
+            if on_progress and resp is None and req.resumable_uri:
+                on_progress(req.resumable_uri, req.resumable_progress)
+            continue
+
+        retries += 1
+        if on_retry:
+            on_retry(error)
+        delay = min(2 ** retries, 64) + random.random()
+        logger.warning(f"Yuklash bo'lagi xatosi ({error}), {delay:.1f}s dan keyin qayta urinish #{retries}")
+        time.sleep(delay)
+    return resp
+
+
+def _video_body(title: str, description: str, tags: list[str]) -> dict:
+    return {
         "snippet": {
             "title": title,
             "description": description,
@@ -39,21 +287,74 @@ def upload_video(db: Session, user: User, file_path: str, title: str, descriptio
         },
         "status": {"privacyStatus": "public"}
     }
-    media = MediaFileUpload(file_path, chunksize=-1, resumable=True)
-    req = service.videos().insert(part="snippet,status", body=body, media_body=media)
-    resp = req.execute()
-    return resp.get("id")
+
+
+def upload_video_stream(user: User, buffer: StreamBuffer, title: str, description: str, tags: list[str],
+                        on_progress=None, on_retry=None):
+    """Blocking: uploads bytes from buffer while they are still being written."""
+    try:
+        service = yt_service(user)
+        if not service:
+            raise RuntimeError("Google account ulangan emas. /connect bosing.")
+
+        quota.check("videos.insert", user.id)
+        quota.charge("videos.insert", user.id)
+        media = StreamMediaUpload(buffer, UPLOAD_CHUNK_SIZE)
+        req = service.videos().insert(part="snippet,status", body=_video_body(title, description, tags), media_body=media)
+        return run_resumable(req, on_progress, on_retry).get("id")
+    except BaseException as e:
+        # Yuklab oluvchi to'lgan buferda kutib qolmasligi uchun
+        buffer.abort(e)
+        raise
+
+
+def upload_video(user: User, file_path: str, title: str, description: str, tags: list[str],
+                 resume_uri: str | None = None, on_progress=None, on_retry=None):
+    """Uploads file_path in UPLOAD_CHUNK_SIZE chunks.
+
+    With resume_uri the existing resumable session is continued from the
+    offset the server reports instead of starting over (and is not charged
+    again). If the session has expired, a new upload is started.
+    """
+    service = yt_service(user)
+    if not service:
+        raise RuntimeError("Google account ulangan emas. /connect bosing.")
+
+    body = _video_body(title, description, tags)
+
+    def new_request():
+        media = MediaFileUpload(file_path, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+        return service.videos().insert(part="snippet,status", body=body, media_body=media)
+
+    if resume_uri:
+        req = new_request()
+        req.resumable_uri = resume_uri
+        # Keyingi next_chunk serverdan qaysi baytlar qabul qilinganini so'raydi ("bytes */N").
+        # Bu HttpRequest'ning ichki bayrog'i - kutubxona o'zi ham uzilgan PUT'dan keyin shu
+        # yo'ldan boradi; google-api-python-client versiyasi requirements.txt'da qat'iy
+        # belgilangan va tests/test_youtube_upload.py shu yo'lni tekshiradi.
+        req._in_error_state = True
+        try:
+            return run_resumable(req, on_progress, on_retry).get("id")
+        except HttpError as e:
+            if e.resp.status not in (404, 410):
+                raise
+            logger.warning(f"Yuklash sessiyasi eskirgan, boshidan boshlanadi: {resume_uri}")
+
+    quota.check("videos.insert", user.id)
+    quota.charge("videos.insert", user.id)
+    return run_resumable(new_request(), on_progress, on_retry).get("id")
 
 def set_thumbnail(user: User, yt_video_id: str, thumbnail_path: str):
     service = yt_service(user)
     if not service:
         raise RuntimeError("Google account ulangan emas.")
     media = MediaFileUpload(thumbnail_path, mimetype="image/jpeg")
-    return service.thumbnails().set(videoId=yt_video_id, media_body=media).execute()
+    return execute(service.thumbnails().set(videoId=yt_video_id, media_body=media), "thumbnails.set", user.id)
 
 def get_basic_stats(user: User):
     service = yt_service(user)
     if not service:
         raise RuntimeError("Google account ulangan emas.")
-    chans = service.channels().list(part="statistics,snippet", mine=True).execute()
+    chans = execute(service.channels().list(part="statistics,snippet", mine=True), "channels.list", user.id)
     return chans
@@ -0,0 +1,123 @@
+"""Local HTTP stand-in for the YouTube resumable upload protocol.
+
+Behaves like upload.googleapis.com: the initial POST answers 200 with a
+Location header, every chunk PUT answers 308 with a Range header, and
+the PUT that completes the file answers 200 with the video JSON. A PUT
+with "Content-Range: bytes */N" asks how much the server already has.
+thumbnails.set is accepted as well, so a whole upload job can run.
+"""
+import copy
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app import youtube
+
+
+class FakeYouTube:
+    def __init__(self):
+        self.sessions: dict[str, bytearray] = {}
+        self.content_ranges: list[str] = []
+        self.fail_puts: set[int] = set()
+        self.puts = 0
+        self.inserts = 0
+        self.thumbnails = 0
+        # Har bir bo'lak javobidan oldingi kechikish (sekin tarmoqni taqlid qiladi)
+        self.put_delay = 0.0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def discovery(self) -> dict:
+        doc = copy.deepcopy(youtube._DISCOVERY_DOCS[("youtube", "v3")])
+        doc["rootUrl"] = self.url + "/"
+        return doc
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, headers: dict | None = None, body: bytes = b""):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def _progress(self, data: bytearray) -> dict:
+                return {"Range": f"bytes=0-{len(data) - 1}"} if data else {}
+
+            def do_POST(self):
+                self._body()
+                if self.path.startswith("/upload/youtube/v3/thumbnails/set"):
+                    with fake._lock:
+                        fake.thumbnails += 1
+                    return self._reply(200, {"Content-Type": "application/json"}, b'{"items": []}')
+                if not self.path.startswith("/upload/youtube/v3/videos"):
+                    return self._reply(404)
+                with fake._lock:
+                    fake.inserts += 1
+                    session = uuid.uuid4().hex
+                    fake.sessions[session] = bytearray()
+                self._reply(200, {"Location": f"{fake.url}/upload/session/{session}"})
+
+            def do_PUT(self):
+                body = self._body()
+                if fake.put_delay:
+                    time.sleep(fake.put_delay)
+                session = self.path.rsplit("/", 1)[-1]
+                content_range = self.headers.get("Content-Range", "")
+                with fake._lock:
+                    data = fake.sessions.get(session)
+                    if data is None:
+                        return self._reply(404)
+                    fake.content_ranges.append(content_range)
+
+                    query = re.fullmatch(r"bytes \*/(\d+|\*)", content_range)
+                    if query:
+                        total = query.group(1)
+                        if total != "*" and int(total) == len(data):
+                            return self._reply(200, {"Content-Type": "application/json"}, self._video(session, data))
+                        return self._reply(308, self._progress(data))
+
+                    fake.puts += 1
+                    if fake.puts in fake.fail_puts:
+                        return self._reply(503, body=b"backend error")
+                    chunk = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+|\*)", content_range)
+                    if not chunk or int(chunk.group(1)) != len(data) or int(chunk.group(2)) < int(chunk.group(1)) \
+                            or int(chunk.group(2)) - int(chunk.group(1)) + 1 != len(body):
+                        return self._reply(400, body=f"bad Content-Range: {content_range}".encode())
+                    data += body
+                    total = chunk.group(3)
+                    if total != "*" and int(total) == len(data):
+                        return self._reply(200, {"Content-Type": "application/json"}, self._video(session, data))
+                    return self._reply(308, self._progress(data))
+
+            def _video(self, session: str, data: bytearray) -> bytes:
+                return json.dumps({"id": "vid-" + session[:8], "size": len(data)}).encode()
+
+        return Handler
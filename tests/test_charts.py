@@ -0,0 +1,18 @@
+import asyncio
+
+from app import charts
+
+ROWS = [["01.01", 10, 20, 3, 1], ["02.01", 15, 25, 2, 0]]
+
+
+def test_chart_renders_in_spawned_workers(monkeypatch):
+    monkeypatch.setattr(charts, "_cache", type(charts._cache)())
+    pool = charts.start_chart_pool()
+    assert pool._mp_context.get_start_method() == "spawn"
+
+    async def main():
+        return await asyncio.gather(charts.get_daily_chart(ROWS), charts.get_daily_chart(ROWS))
+
+    first, second = asyncio.run(main())
+    assert first.startswith(b"\x89PNG") and first == second
+    assert list(charts._cache.values()) == [first]
@@ -0,0 +1,31 @@
+import datetime
+import os
+
+from openpyxl import load_workbook
+
+from app.export import write_stats_xlsx
+from app.models import ChannelDailyMetric, ChannelVideo
+from app.statistics import save_channel_id
+from app.utils import session_scope
+
+
+def test_export_contains_only_the_current_channel(google_user):
+    with session_scope() as db:
+        for channel_id in ("UC_old", "UC_new"):
+            db.add(ChannelVideo(video_id=f"{channel_id}_v", user_id=google_user.id, channel_id=channel_id,
+                                title=channel_id))
+            db.add(ChannelDailyMetric(channel_id=channel_id, user_id=google_user.id, day=datetime.date.today(),
+                                      views=len(channel_id)))
+    save_channel_id(google_user.id, "UC_new")
+
+    path = write_stats_xlsx(google_user.id)
+    try:
+        wb = load_workbook(path, read_only=True)
+        videos = list(wb["Videolar"].iter_rows(min_row=2, values_only=True))
+        days = list(wb["Kunlik"].iter_rows(min_row=2, values_only=True))
+        wb.close()
+    finally:
+        os.remove(path)
+
+    assert [row[0] for row in videos] == ["UC_new_v"]
+    assert len(days) == 1
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from app.ai import parse_partial_json
+
+ANSWER = json.dumps({
+    "title": 'Python "asyncio" darsi \U0001F680',
+    "description": "Birinchi qator\nIkkinchi qator\tva tab",
+    "tags": ["python", "asyncio", "dars"],
+    "score": 7,
+    "extra": "oxirgi",
+}, ensure_ascii=True, indent=1)
+
+
+def test_complete_text_matches_json_loads():
+    expected = json.loads(ANSWER)
+    # Son qiymatlar SEO javobida kutilmaydi va o'tkazib yuboriladi
+    del expected["score"]
+    assert parse_partial_json(ANSWER) == expected
+
+
+@pytest.mark.parametrize("cut", range(len(ANSWER)))
+def test_every_prefix_is_a_prefix_of_the_answer(cut):
+    final = json.loads(ANSWER)
+    partial = parse_partial_json(ANSWER[:cut])
+    for key, value in partial.items():
+        if isinstance(value, list):
+            # Massivda faqat tugallangan elementlar bo'ladi
+            assert value == final[key][:len(value)]
+        else:
+            assert final[key].startswith(value)
+
+
+def test_text_before_the_object_is_ignored():
+    text = '```json\n{"title": "Salom", "tags": ["a", "b'
+    assert parse_partial_json(text) == {"title": "Salom", "tags": ["a"]}
+
+
+def test_cut_escape_is_not_emitted():
+    assert parse_partial_json('{"title": "a\\') == {"title": "a"}
+    assert parse_partial_json('{"title": "a\\u00') == {"title": "a"}
+    assert parse_partial_json('{"title": "a\\ud83d') == {"title": "a"}
+
+
+def test_no_object_yet():
+    assert parse_partial_json("") == {}
+    assert parse_partial_json("```json") == {}
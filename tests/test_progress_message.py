@@ -0,0 +1,51 @@
+import asyncio
+import types
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import EditMessageText
+
+from app.uploads import ProgressMessage
+
+METHOD = EditMessageText(text="x")
+
+
+class FlakyBot:
+    """edit_message_text raises the queued errors first, then succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.shown: list[str] = []
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        return types.SimpleNamespace(message_id=1)
+
+    async def edit_message_text(self, text, chat_id=None, message_id=None, reply_markup=None):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.shown.append(text)
+
+
+def test_network_and_server_errors_do_not_escape():
+    bot = FlakyBot(TelegramNetworkError(METHOD, "timeout"), TelegramServerError(METHOD, "bad gateway"))
+    progress = ProgressMessage(bot, 1, 10, "")
+
+    async def main():
+        await progress.set_stage("a")
+        await progress.set_stage("b")
+        await progress.set_stage("c")
+
+    asyncio.run(main())
+    assert bot.shown == ["c"]
+
+
+def test_flood_control_skips_progress_but_not_the_result():
+    bot = FlakyBot(TelegramRetryAfter(METHOD, "flood", retry_after=0.2))
+    progress = ProgressMessage(bot, 1, 10, "")
+
+    async def main():
+        await progress.edit("10%")
+        await progress.edit("20%")
+        await progress.edit("done", final=True)
+
+    asyncio.run(main())
+    assert bot.shown == ["done"]
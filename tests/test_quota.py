@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import quota as quota_module
+from app.models import QuotaUsage
+from app.quota import QuotaLedger
+from app.utils import session_scope
+
+
+def persisted(api: str = "youtube") -> dict[int, int]:
+    with session_scope() as db:
+        return {row.user_id: row.units for row in db.query(QuotaUsage).filter(QuotaUsage.api == api)}
+
+
+def test_concurrent_charges_are_all_persisted(file_db):
+    ledger = QuotaLedger({"youtube": 10 ** 6, "youtubeAnalytics": 10 ** 6}, 1.0)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: ledger.charge("videos.list", user_id=i % 2 + 1), range(200)))
+
+    assert persisted() == {1: 100, 2: 100}
+    assert ledger.remaining() == 10 ** 6 - 200
+
+
+def test_load_restores_usage_after_restart():
+    QuotaLedger({"youtube": 10000, "youtubeAnalytics": 10000}, 0.5).charge("search.list", user_id=7)
+
+    restarted = QuotaLedger({"youtube": 10000, "youtubeAnalytics": 10000}, 0.5)
+    assert restarted.remaining(user_id=7) == 5000
+    restarted.load()
+    assert restarted.remaining() == 9900
+    assert restarted.remaining(user_id=7) == 4900
+
+
+def test_checks_do_not_wait_for_database_writes(monkeypatch):
+    ledger = QuotaLedger({"youtube": 10000, "youtubeAnalytics": 10000}, 1.0)
+    writing = threading.Event()
+    real_persist = ledger._persist
+
+    def slow_persist(*args):
+        writing.set()
+        time.sleep(0.5)
+        real_persist(*args)
+
+    monkeypatch.setattr(ledger, "_persist", slow_persist)
+    writer = threading.Thread(target=ledger.charge, args=("videos.list",))
+    writer.start()
+    writing.wait()
+
+    started = time.monotonic()
+    assert ledger.allows("videos.insert")
+    assert ledger.remaining() == 9999
+    assert time.monotonic() - started < 0.1
+    writer.join()
+
+
+def test_day_rollover_does_not_touch_database(monkeypatch):
+    ledger = QuotaLedger({"youtube": 10000, "youtubeAnalytics": 10000}, 1.0)
+    ledger.charge("videos.list")
+
+    def no_db():
+        raise AssertionError("database used on rollover")
+
+    monkeypatch.setattr(quota_module, "session_scope", no_db)
+    monkeypatch.setattr(ledger, "_today", lambda: ledger._day.replace(year=ledger._day.year + 1))
+    assert ledger.remaining() == 10000
@@ -0,0 +1,38 @@
+import pytest
+
+from app.seo_local import DESCRIPTION_MAX, TAGS_MAX, TAGS_TOTAL_MAX, TITLE_MAX, keywords, local_seo, make_tags
+
+
+def test_keywords_skip_stopwords_and_keep_order():
+    assert keywords("How to learn Python and FastAPI with Python") == ["learn", "python", "fastapi"]
+    assert keywords("C++ va C# uchun darslik") == ["c++", "c#", "darslik"]
+
+
+@pytest.mark.parametrize("lang,intro", [("en", "In this video"), ("uz", "Ushbu videoda"), ("ru", "В этом видео")])
+def test_same_shape_as_gen_seo(lang, intro):
+    seo = local_seo("  python   fastapi darsi  ", lang)
+    assert set(seo) == {"title", "description", "tags"}
+    assert seo["title"] == "Python fastapi darsi"
+    assert seo["description"].startswith(f"{intro}: python fastapi darsi.")
+    assert "#python #fastapi #darsi" in seo["description"]
+    assert seo["tags"][0] == "python fastapi darsi"
+    assert "python fastapi" in seo["tags"]
+
+
+def test_unknown_language_falls_back_to_english():
+    assert local_seo("docker compose", "de") == local_seo("docker compose", "en")
+
+
+def test_youtube_limits_hold_for_long_topics():
+    topic = " ".join(f"so'z{i}" for i in range(300))
+    seo = local_seo(topic, "uz")
+    assert len(seo["title"]) <= TITLE_MAX
+    assert len(seo["description"]) <= DESCRIPTION_MAX
+    assert len(seo["tags"]) <= TAGS_MAX
+    assert sum(len(tag) for tag in seo["tags"]) <= TAGS_TOTAL_MAX
+    assert all(len(tag) <= TITLE_MAX for tag in seo["tags"])
+
+
+def test_tags_are_unique():
+    tags = make_tags("python python python darslik", "uz")
+    assert len(tags) == len(set(tags))
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return f"result {key}"
+
+    async def main():
+        flights = SingleFlight("test")
+        same = [flights.do("a", fetch, "a") for _ in range(5)]
+        return await asyncio.gather(*same, flights.do("b", fetch, "b"))
+
+    results = asyncio.run(main())
+    assert results == ["result a"] * 5 + ["result b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_key_is_free_again_after_the_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        flights = SingleFlight("test")
+        return [await flights.do("a", fetch), await flights.do("a", fetch)]
+
+    # Natija keshlanmaydi: keyingi chaqiruv yangi so'rov
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_late_joiner_gets_every_streamed_item():
+    async def produce():
+        for i in range(3):
+            yield i
+            await asyncio.sleep(0.02)
+
+    async def collect(flights):
+        return [item async for item in flights.stream("k", produce)]
+
+    async def main():
+        flights = SingleFlight("test")
+        first = asyncio.create_task(collect(flights))
+        await asyncio.sleep(0.03)
+        return await first, await collect(flights)
+
+    first, late = asyncio.run(main())
+    assert first == late == [0, 1, 2]
+
+
+def test_error_reaches_every_caller():
+    async def fail():
+        await asyncio.sleep(0.02)
+        raise ValueError("upstream")
+
+    async def main():
+        flights = SingleFlight("test")
+        return await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert [type(e) for e in errors] == [ValueError] * 3
+
+
+def test_cancelled_caller_does_not_cancel_the_call():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        flights = SingleFlight("test")
+        leader = asyncio.create_task(flights.do("k", slow))
+        follower = asyncio.create_task(flights.do("k", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,62 @@
+import asyncio
+import datetime
+
+from app.models import ChannelDailyMetric, User
+from app.statistics import get_daily_series, save_channel_id
+from app.utils import session_scope
+
+
+def add_days(user_id: int, channel_id: str, views: int, updated_at: datetime.datetime):
+    today = datetime.date.today()
+    with session_scope() as db:
+        for n in range(3):
+            db.add(ChannelDailyMetric(channel_id=channel_id, user_id=user_id, day=today - datetime.timedelta(days=n),
+                                      views=views, updated_at=updated_at))
+
+
+def test_daily_series_uses_the_current_channel(google_user):
+    old, new = datetime.datetime(2024, 1, 1), datetime.datetime(2024, 2, 1)
+    add_days(google_user.id, "UC_new", 5, old)
+    add_days(google_user.id, "UC_old", 1, new)
+
+    save_channel_id(google_user.id, "UC_new")
+    rows = get_daily_series(google_user.id)
+    assert [row[1] for row in rows] == [5, 5, 5]
+    with session_scope() as db:
+        assert db.get(User, google_user.id).yt_channel_id == "UC_new"
+
+
+def test_daily_series_falls_back_to_the_last_synced_channel(google_user):
+    add_days(google_user.id, "UC_old", 1, datetime.datetime(2024, 1, 1))
+    add_days(google_user.id, "UC_new", 5, datetime.datetime(2024, 2, 1))
+    assert [row[1] for row in get_daily_series(google_user.id)] == [5, 5, 5]
+
+
+def test_daily_series_is_empty_without_data(google_user):
+    assert get_daily_series(google_user.id) == []
+
+
+def test_reconnected_account_does_not_get_the_old_snapshot(google_user, monkeypatch):
+    from app import statistics
+
+    fetched = []
+
+    async def fake_stats(user_id, token_json):
+        fetched.append(token_json)
+        return {"title": token_json}
+
+    monkeypatch.setattr(statistics, "get_channel_stats", fake_stats)
+    cache = statistics.StatsCache(ttl=3600, max_size=10, persist=True)
+    restarted = statistics.StatsCache(ttl=3600, max_size=10, persist=True)
+
+    async def main():
+        first = await cache.get(google_user.id, "old-token")
+        again = await restarted.get(google_user.id, "old-token")
+        switched = await restarted.get(google_user.id, "new-token")
+        return first, again, switched
+
+    first, again, switched = asyncio.run(main())
+    assert first[0] == again[0] == {"title": "old-token"}
+    # Boshqa akkaunt ulanganda eski kanal snapshoti ko'rsatilmaydi, yangisi kutib olinadi
+    assert switched[0] == {"title": "new-token"}
+    assert fetched == ["old-token", "new-token"]
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from app import uploads, youtube
+from app.youtube import StreamBuffer
+
+CHUNK = 256 * 1024
+
+
+def test_buffer_keeps_uncommitted_bytes_for_resend():
+    buffer = StreamBuffer(1024)
+    buffer.write(b"abcdef")
+    assert buffer.read(0, 4) == b"abcd"
+    # Xatodan keyin shu bo'lak qayta so'ralishi mumkin
+    assert buffer.read(0, 4) == b"abcd"
+    buffer.close()
+    assert buffer.read(4, 4) == b"ef"
+
+
+def test_buffer_write_blocks_until_reader_commits():
+    buffer = StreamBuffer(4)
+    buffer.write(b"1234")
+    written = threading.Event()
+    writer = threading.Thread(target=lambda: (buffer.write(b"5678"), written.set()))
+    writer.start()
+    assert not written.wait(0.1)
+    buffer.read(4, 4)
+    assert written.wait(1)
+    writer.join()
+
+
+def test_abort_releases_blocked_reader_and_writer():
+    buffer = StreamBuffer(2)
+    buffer.write(b"12")
+    errors = []
+
+    def run(fn):
+        try:
+            fn()
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(lambda: buffer.write(b"34"),)),
+               threading.Thread(target=run, args=(lambda: buffer.read(0, 10),))]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    buffer.abort(ValueError("stop"))
+    for t in threads:
+        t.join(1)
+        assert not t.is_alive()
+    assert len(errors) == 2
+
+
+@pytest.mark.parametrize("write_size", [100 * 1024, CHUNK // 2])
+@pytest.mark.parametrize("size", [CHUNK * 2, CHUNK * 2 + 1000, CHUNK - 10])
+def test_stream_upload_finishes_with_data(fake_youtube, google_user, size, write_size):
+    payload = os.urandom(size)
+    # Eng kichik ruxsat etilgan bufer: ikki bo'lak, yozuvlar bo'lak chegarasiga to'g'ri keladi
+    buffer = StreamBuffer(CHUNK * 2)
+
+    def produce():
+        for i in range(0, size, write_size):
+            buffer.write(payload[i:i + write_size])
+            time.sleep(0.01)
+        buffer.close()
+
+    result = []
+    threads = [threading.Thread(target=produce, daemon=True),
+               threading.Thread(target=lambda: result.append(
+                   youtube.upload_video_stream(google_user, buffer, "T", "D", ["a"])), daemon=True)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+        assert not t.is_alive(), "yuklash va yozish bir-birini kutib qoldi"
+    (video_id,) = result
+
+    (data,) = [bytes(d) for s, d in fake_youtube.sessions.items() if video_id == "vid-" + s[:8]]
+    assert data == payload
+    # Oxirgi PUT ham bayt olib boradi va umumiy hajmni aytadi
+    assert fake_youtube.content_ranges[-1].endswith(f"-{size - 1}/{size}")
+
+
+def test_cancelled_stream_releases_threads(fake_youtube, google_user, monkeypatch):
+    async def slow_telegram(bot, file_path):
+        yield os.urandom(CHUNK)
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(uploads, "telegram_chunks", slow_telegram)
+
+    async def main():
+        task = asyncio.create_task(uploads.stream_to_youtube(None, "f", google_user, "T", "D", []))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    # asyncio.run executor threadlarini kutadi: bufer bo'shatilmasa bu yerda osilib qoladi
+    runner = threading.Thread(target=asyncio.run, args=(main(),), daemon=True)
+    runner.start()
+    runner.join(10)
+    assert not runner.is_alive()
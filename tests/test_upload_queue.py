@@ -0,0 +1,161 @@
+"""Simulated load: many jobs from a few users through UploadQueue and process_job.
+
+Uploads go to the local YouTube stand-in, so the whole worker path runs:
+_start_job, publish_job with chunked resumable uploads, finish_job.
+"""
+import asyncio
+import os
+import re
+import threading
+import types
+from collections import Counter, deque
+
+import pytest
+from app import uploads
+from app.models import User, VideoJob
+from app.quota import quota
+from app.uploads import UploadQueue
+from app.utils import session_scope
+from tests.conftest import TOKEN
+
+CHUNK = 256 * 1024
+
+
+def _queue(waiting: dict[int, list[int]], per_user=1) -> UploadQueue:
+    queue = UploadQueue(workers=2, per_user=per_user)
+    for user_id, job_ids in waiting.items():
+        queue._waiting[user_id] = deque(job_ids)
+    return queue
+
+
+def test_take_is_round_robin():
+    queue = _queue({1: [11, 12, 13], 2: [21], 3: [31, 32]}, per_user=5)
+    taken = [queue._take() for _ in range(6)]
+    assert [job_id for _, job_id in taken] == [11, 21, 31, 12, 32, 13]
+    assert queue._take() is None
+
+
+def test_take_skips_users_at_their_cap():
+    queue = _queue({1: [11, 12], 2: [21]})
+    assert queue._take() == (1, 11)
+    assert queue._take() == (2, 21)
+    # 1-foydalanuvchining bitta jobi ishlayapti, ikkinchisi kutadi
+    assert queue._take() is None
+    queue._running[1] -= 1
+    assert queue._take() == (1, 12)
+
+
+def test_position_follows_take_order():
+    queue = _queue({1: [11, 12, 13], 2: [21], 3: [31, 32]})
+    assert [queue.position(j) for j in (11, 21, 31, 12, 32, 13)] == [1, 2, 3, 4, 5, 6]
+    assert queue.position(99) is None
+
+
+class FakeBot:
+    def __init__(self):
+        self.session = types.SimpleNamespace(api=types.SimpleNamespace(is_local=False))
+        self.edits: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        return types.SimpleNamespace(message_id=0)
+
+    async def edit_message_text(self, text, chat_id=None, message_id=None, reply_markup=None):
+        self.edits.append((message_id, text))
+
+
+@pytest.fixture
+def jobs(file_db, tmp_path):
+    """Six jobs of user A, two of B, one of C, submitted in that order."""
+    video = tmp_path / "video.mp4"
+    video.write_bytes(os.urandom(CHUNK * 2 + 1000))
+    thumb = tmp_path / "thumb.jpg"
+    thumb.write_bytes(b"\xff\xd8\xff\xd9")
+    created = []
+    with session_scope() as db:
+        for name, count in (("A", 6), ("B", 2), ("C", 1)):
+            user = User(tg_id=name, google_token_json=TOKEN)
+            db.add(user)
+            db.flush()
+            for i in range(count):
+                job = VideoJob(user_id=user.id, topic=f"{name}{i}", title=f"{name}{i}", description="d", tags="a",
+                               file_path=str(video), thumbnail_path=str(thumb), status="queued",
+                               chat_id=1, progress_message_id=100 + len(created))
+                db.add(job)
+                db.flush()
+                created.append((job.id, user.id, name))
+    return created
+
+
+def test_round_robin_with_global_and_per_user_caps(fake_youtube, jobs, monkeypatch):
+    monkeypatch.setitem(quota.limits, "youtube", 10 ** 6)
+    monkeypatch.setattr(quota, "user_share", 1.0)
+    monkeypatch.setattr(uploads, "UPLOAD_PROGRESS_INTERVAL", 0.01)
+    fake_youtube.put_delay = 0.03
+
+    owner = {user_id: name for _, user_id, name in jobs}
+    lock = threading.Lock()
+    running: Counter[str] = Counter()
+    peaks = {"total": 0, "user": 0}
+    started: list[str] = []
+    real_upload = uploads.upload_video
+
+    def counted_upload(user, *args, **kwargs):
+        name = owner[user.id]
+        with lock:
+            running[name] += 1
+            peaks["total"] = max(peaks["total"], sum(running.values()))
+            peaks["user"] = max(peaks["user"], running[name])
+        try:
+            return real_upload(user, *args, **kwargs)
+        finally:
+            with lock:
+                running[name] -= 1
+
+    monkeypatch.setattr(uploads, "upload_video", counted_upload)
+
+    # Ishchilar jobni qaysi tartibda olgani (_take -> process_job)
+    job_owner = {job_id: name for job_id, _, name in jobs}
+    real_process = uploads.process_job
+
+    async def recorded_process(bot, job_id, queue_wait=None):
+        started.append(job_owner[job_id])
+        await real_process(bot, job_id, queue_wait)
+
+    monkeypatch.setattr(uploads, "process_job", recorded_process)
+
+    async def main():
+        bot = FakeBot()
+        queue = UploadQueue(workers=2, per_user=1)
+        queue.start(bot)
+        for job_id, user_id, _ in jobs:
+            await queue.submit(job_id, user_id)
+        while queue._pending:
+            await asyncio.sleep(0.02)
+        for task in queue._tasks:
+            task.cancel()
+        return bot
+
+    bot = asyncio.run(main())
+
+    with session_scope() as db:
+        statuses = [job.status for job in db.query(VideoJob)]
+    assert statuses == ["uploaded"] * len(jobs)
+    assert fake_youtube.inserts == len(jobs)
+    assert fake_youtube.thumbnails == len(jobs)
+
+    assert peaks == {"total": 2, "user": 1}
+    # A ko'p video yuborgan bo'lsa ham B va C navbatini kutib o'tirmaydi
+    assert started[:3] == ["A", "B", "C"]
+    assert started.index("C") < [i for i, name in enumerate(started) if name == "A"][2]
+    assert sorted(started) == sorted(name for _, _, name in jobs)
+
+    # Kutayotgan joblar xabarida navbatdagi o'rni ko'rsatildi
+    first_place = {}
+    for message_id, text in bot.edits:
+        match = re.search(r"Navbatda: (\d+)-o'rin", text)
+        if match:
+            first_place.setdefault(message_id, int(match.group(1)))
+    c_message = 100 + len(jobs) - 1
+    last_a_message = 105
+    assert first_place[c_message] == 1
+    assert first_place[last_a_message] == 7
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from app import youtube
+
+CHUNK = 256 * 1024
+
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(os.urandom(CHUNK * 2 + 90 * 1024))
+    return str(path)
+
+
+def uploaded(fake_youtube, video_id: str) -> bytes:
+    (data,) = [bytes(d) for s, d in fake_youtube.sessions.items() if video_id == "vid-" + s[:8]]
+    return data
+
+
+def test_chunked_upload(fake_youtube, google_user, video_file):
+    progress = []
+    video_id = youtube.upload_video(google_user, video_file, "T", "D", ["a"],
+                                    on_progress=lambda uri, offset: progress.append(offset))
+
+    assert uploaded(fake_youtube, video_id) == open(video_file, "rb").read()
+    # Har bir bo'lak 308 + Range bilan tasdiqlangan, oxirgisi esa videoni qaytargan
+    assert progress == [CHUNK, CHUNK * 2]
+    assert fake_youtube.inserts == 1
+
+
+def test_server_error_is_retried(fake_youtube, google_user, video_file):
+    fake_youtube.fail_puts = {2}
+    retries = []
+    video_id = youtube.upload_video(google_user, video_file, "T", "D", ["a"], on_retry=retries.append)
+
+    assert uploaded(fake_youtube, video_id) == open(video_file, "rb").read()
+    assert len(retries) == 1
+    # Xatodan keyin server qaysi baytlar borligini so'raldi, hech narsa qayta yuborilmadi
+    assert any(r.startswith("bytes */") for r in fake_youtube.content_ranges)
+    assert sum(1 for r in fake_youtube.content_ranges if r.startswith(f"bytes {CHUNK}-")) == 2
+
+
+class Crash(Exception):
+    pass
+
+
+def test_resume_from_upload_uri(fake_youtube, google_user, video_file):
+    saved = {}
+
+    def crash_after_first_chunk(uri, offset):
+        saved["uri"], saved["offset"] = uri, offset
+        raise Crash()
+
+    with pytest.raises(Crash):
+        youtube.upload_video(google_user, video_file, "T", "D", ["a"], on_progress=crash_after_first_chunk)
+    assert saved["offset"] == CHUNK
+
+    fake_youtube.content_ranges.clear()
+    video_id = youtube.upload_video(google_user, video_file, "T", "D", ["a"], resume_uri=saved["uri"])
+
+    assert uploaded(fake_youtube, video_id) == open(video_file, "rb").read()
+    assert fake_youtube.inserts == 1
+    assert fake_youtube.content_ranges[0].startswith("bytes */")
+    assert fake_youtube.content_ranges[1].startswith(f"bytes {CHUNK}-")
+
+
+def test_expired_session_starts_over(fake_youtube, google_user, video_file):
+    video_id = youtube.upload_video(google_user, video_file, "T", "D", ["a"],
+                                    resume_uri=f"{fake_youtube.url}/upload/session/expired")
+
+    assert uploaded(fake_youtube, video_id) == open(video_file, "rb").read()
+    assert fake_youtube.inserts == 1